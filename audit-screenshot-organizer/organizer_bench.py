@@ -0,0 +1,219 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import organizer_pipeline
+from organizer_engine import OrganizerEngine
+
+SCENARIOS = ("direct", "rename", "locked")
+
+
+def png_bytes(size: int) -> bytes:
+    width = max(1, int((max(size, 64) // 3) ** 0.5))
+    row = b"\x00" + os.urandom(width * 3)
+    raw = row * width
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, width, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 0)) + chunk(b"IEND", b"")
+
+
+def unique_png(base: bytes, n: int) -> bytes:
+    data = f"bench\x00{n}".encode("ascii")
+    text = struct.pack(">I", len(data)) + b"tEXt" + data + struct.pack(">I", zlib.crc32(b"tEXt" + data))
+    return base[:-12] + text + base[-12:]
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class SimulatedLocks:
+    def __init__(self):
+        self.until = {}
+        self._lock = threading.Lock()
+        self._move = organizer_pipeline.move_file
+
+    def hold(self, path: str, seconds: float):
+        with self._lock:
+            self.until[path] = time.perf_counter() + seconds
+
+    def move_file(self, src, dst, *args, **kwargs):
+        with self._lock:
+            until = self.until.get(src)
+        if until is not None and time.perf_counter() < until:
+            raise PermissionError(13, "The process cannot access the file because it is being used by another process", src)
+        return self._move(src, dst, *args, **kwargs)
+
+    def __enter__(self):
+        organizer_pipeline.move_file = self.move_file
+        return self
+
+    def __exit__(self, *exc):
+        organizer_pipeline.move_file = self._move
+
+
+class BenchEngine(OrganizerEngine):
+    def __init__(self):
+        super().__init__(log=None)
+        self.landed = {}
+        self._landed_lock = threading.Lock()
+
+    def file_landed(self, path, method, session_folder=None, source=None, digest=None, extra=None):
+        result = super().file_landed(path, method, session_folder=session_folder, source=source, digest=digest, extra=extra)
+        with self._landed_lock:
+            self.landed[source or path] = time.perf_counter()
+        return result
+
+
+def drop_files(source: str, scenario: str, count: int, rate: float, payload: bytes, lock_seconds: float, locks, dropped: dict):
+    interval = 1.0 / rate if rate > 0 else 0.0
+    start = time.perf_counter()
+    held = []
+    for n in range(count):
+        due = start + n * interval
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        path = os.path.join(source, f"bench_{scenario}_{n:06d}.png")
+        data = unique_png(payload, n)
+        if scenario == "rename":
+            tmp_path = f"{path}.part"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            dropped[path] = time.perf_counter()
+        elif scenario == "locked" and locks is None:
+            f = open(path, "wb")
+            f.write(data)
+            f.flush()
+            dropped[path] = time.perf_counter()
+            held.append((time.perf_counter() + lock_seconds, f))
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
+            dropped[path] = time.perf_counter()
+            if scenario == "locked":
+                locks.hold(path, lock_seconds)
+        while held and held[0][0] <= time.perf_counter():
+            held.pop(0)[1].close()
+    for until, f in held:
+        remaining = until - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        f.close()
+
+
+def run_scenario(scenario: str, count: int, rate: float, size: int, workers: int, lock_ms: float, timeout: float) -> dict:
+    root = tempfile.mkdtemp(prefix="organizer-bench-")
+    source = os.path.join(root, "source")
+    os.makedirs(source)
+    engine = BenchEngine()
+    engine.screenshot_folder = source
+    engine.output_base_folder = os.path.join(root, "evidence")
+    engine.move_workers = workers
+    engine.dedup_mode = "keep"
+    engine.catalog_enabled = False
+    payload = png_bytes(size)
+    dropped = {}
+    real_locks = scenario == "locked" and platform.system() == "Windows"
+    locks = SimulatedLocks() if scenario == "locked" and not real_locks else None
+
+    try:
+        engine.start()
+        engine.create_session_folder()
+        engine.start_watching()
+        time.sleep(0.2)
+        if locks:
+            locks.__enter__()
+        t0 = time.perf_counter()
+        drop_files(source, scenario, count, rate, payload, lock_ms / 1000, locks, dropped)
+        t_dropped = time.perf_counter()
+        deadline = t_dropped + timeout
+        while len(engine.landed) < count and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        t_done = time.perf_counter()
+    finally:
+        if locks:
+            locks.__exit__(None, None, None)
+        engine.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+    latencies = sorted((engine.landed[p] - t) * 1000 for p, t in dropped.items() if p in engine.landed)
+    filed = len(latencies)
+    last = max(engine.landed.values()) if engine.landed else t_done
+    span = last - t0
+    return {
+        "scenario": scenario,
+        "count": count,
+        "filed": filed,
+        "missing": count - filed,
+        "rate_target": rate,
+        "file_bytes": len(payload),
+        "move_workers": workers,
+        "lock_ms": lock_ms if scenario == "locked" else 0,
+        "locks": ("os" if real_locks else "simulated") if scenario == "locked" else None,
+        "drop_seconds": round(t_dropped - t0, 3),
+        "elapsed_seconds": round(span, 3),
+        "throughput_per_second": round(filed / span, 1) if span > 0 else 0.0,
+        "latency_ms": {
+            "min": round(latencies[0], 2) if latencies else None,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else None,
+            "mean": round(sum(latencies) / filed, 2) if filed else None,
+        },
+    }
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the watch-folder → session ingestion pipeline headlessly.")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="drop patterns to run")
+    parser.add_argument("--count", type=int, default=500, help="files dropped per scenario")
+    parser.add_argument("--rate", type=float, default=50.0, help="files dropped per second (0 = as fast as possible)")
+    parser.add_argument("--size", type=int, default=256, help="approximate PNG size in KB")
+    parser.add_argument("--workers", type=int, default=organizer_pipeline.DEFAULT_MOVE_WORKERS, help="move worker threads")
+    parser.add_argument("--lock-ms", type=float, default=300.0, help="how long each file stays locked in the locked scenario")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for stragglers after the last drop")
+    parser.add_argument("--out", help="append results as one JSON line to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    run = {
+        "started": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "results": [],
+    }
+    for scenario in args.scenario:
+        run["results"].append(
+            run_scenario(scenario, max(1, args.count), args.rate, args.size * 1024, max(1, args.workers), args.lock_ms, args.timeout)
+        )
+    print(json.dumps(run, indent=2))
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, sort_keys=True) + "\n")
+    return 0 if all(r["missing"] == 0 for r in run["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
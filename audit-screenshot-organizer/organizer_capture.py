@@ -0,0 +1,297 @@
+import asyncio
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer_integrity import TMP_SUFFIX
+from organizer_metrics import ENCODE_SECONDS, GRAB_SECONDS
+
+DEFAULT_ENCODER_WORKERS = 2
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+MAX_PENDING_FRAMES = 8
+MONITOR_MODES = ("primary", "all")
+DEFAULT_INTERVAL_SECONDS = 5.0
+DEFAULT_MIN_CHANGE_PERCENT = 0.5
+MAX_FRAME_FAILURES = 5
+DIFF_WIDTH = 160
+DIFF_TOLERANCE = 12
+
+
+def _windows_monitors():
+    import ctypes
+    from ctypes import wintypes
+
+    class MONITORINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.DWORD), ("rcMonitor", wintypes.RECT), ("rcWork", wintypes.RECT), ("dwFlags", wintypes.DWORD)]
+
+    user32 = ctypes.windll.user32
+    found = []
+
+    def on_monitor(hmonitor, hdc, rect, data):
+        info = MONITORINFO()
+        info.cbSize = ctypes.sizeof(MONITORINFO)
+        if user32.GetMonitorInfoW(hmonitor, ctypes.byref(info)):
+            r = info.rcMonitor
+            found.append((r.left, r.top, r.right, r.bottom, bool(info.dwFlags & 1)))
+        return True
+
+    proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HMONITOR, wintypes.HDC, ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+    previous = None
+    try:
+        previous = user32.SetThreadDpiAwarenessContext(ctypes.c_void_p(-4))
+    except AttributeError:
+        pass
+    try:
+        user32.EnumDisplayMonitors(None, None, proc(on_monitor), 0)
+    finally:
+        if previous:
+            user32.SetThreadDpiAwarenessContext(ctypes.c_void_p(previous))
+    return found
+
+
+def _xrandr_monitors():
+    try:
+        res = subprocess.run(["xrandr", "--listmonitors"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    found = []
+    pattern = re.compile(r"^\s*\d+:\s+\+?(\*?)\S+\s+(\d+)/\d+x(\d+)/\d+([+-]\d+)([+-]\d+)")
+    for line in res.stdout.splitlines():
+        m = pattern.match(line)
+        if m:
+            width, height, left, top = (int(g) for g in m.groups()[1:])
+            found.append((left, top, left + width, top + height, bool(m.group(1))))
+    return found
+
+
+def list_monitors():
+    try:
+        sysname = platform.system()
+        if sysname == "Windows":
+            return _windows_monitors()
+        if sysname == "Linux":
+            return _xrandr_monitors()
+    except Exception:
+        pass
+    return []
+
+
+def monitor_choices():
+    return list(MONITOR_MODES) + [str(n) for n in range(1, len(list_monitors()) + 1)]
+
+
+def grab_kwargs(monitor) -> dict:
+    monitor = str(monitor or "primary").strip().lower()
+    if monitor == "primary":
+        return {}
+    if monitor == "all":
+        return {"all_screens": True}
+    try:
+        n = int(monitor)
+    except ValueError:
+        raise ValueError(f"Unknown monitor {monitor!r}. Use primary, all, or a monitor number.")
+    monitors = list_monitors()
+    if not 1 <= n <= len(monitors):
+        raise ValueError(f"Monitor {n} not found ({len(monitors)} detected).")
+    left, top, right, bottom, _ = monitors[n - 1]
+    return {"bbox": (left, top, right, bottom), "all_screens": True}
+
+
+def grab_frame(bbox=None, all_screens: bool = False):
+    from PIL import ImageGrab
+
+    t0 = time.perf_counter()
+    img = ImageGrab.grab(bbox=bbox, all_screens=all_screens)
+    return img, time.perf_counter() - t0
+
+
+def ms(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+class FrameEncoder:
+    def __init__(self, engine, workers: int = DEFAULT_ENCODER_WORKERS, max_pending: int = MAX_PENDING_FRAMES):
+        self.engine = engine
+        self.workers = max(1, int(workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="png-encode")
+        self._slots = threading.BoundedSemaphore(max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.grab_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def submit(self, img, out_path: str, method: str, grab_seconds: float, compress_level: int, on_saved=None):
+        self._slots.acquire()
+        try:
+            return self._pool.submit(self._encode, img, out_path, method, grab_seconds, compress_level, on_saved)
+        except RuntimeError:
+            self._slots.release()
+            raise
+
+    def _encode(self, img, out_path: str, method: str, grab_seconds: float, compress_level: int, on_saved):
+        ok = False
+        name = os.path.basename(out_path)
+        try:
+            t0 = time.perf_counter()
+            tmp_path = f"{out_path}{TMP_SUFFIX}"
+            try:
+                img.save(tmp_path, "PNG", compress_level=compress_level)
+                os.replace(tmp_path, out_path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            encode_seconds = time.perf_counter() - t0
+            with self._lock:
+                self.frames += 1
+                self.grab_seconds += grab_seconds
+                self.encode_seconds += encode_seconds
+            GRAB_SECONDS.observe(grab_seconds, method=method)
+            ENCODE_SECONDS.observe(encode_seconds, method=method)
+            if self.engine.file_landed(out_path, method):
+                self.engine.log(f"Saved: {name} (grab {ms(grab_seconds)} ms, encode {ms(encode_seconds)} ms)")
+            ok = True
+        except Exception as e:
+            self.engine.name_index(os.path.dirname(out_path)).release(out_path)
+            self.engine.log(f"Could not save {name}: {e}")
+        finally:
+            self._slots.release()
+            if on_saved:
+                on_saved(ok)
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.frames:
+                return ""
+            return (
+                f"Encoded {self.frames} capture(s): grab {ms(self.grab_seconds / self.frames)} ms avg, "
+                f"encode {ms(self.encode_seconds / self.frames)} ms avg on {self.workers} thread(s)"
+            )
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+        summary = self.summary()
+        if summary:
+            self.engine.log(summary)
+
+
+def diff_signature(img):
+    factor = max(1, img.width // DIFF_WIDTH)
+    small = img.reduce(factor) if factor > 1 else img
+    small = small.convert("L")
+    try:
+        import numpy as np
+    except ImportError:
+        return small
+    return np.asarray(small, dtype=np.int16)
+
+
+def changed_fraction(previous, current) -> float:
+    if previous is None:
+        return 1.0
+    if hasattr(current, "shape"):
+        if previous.shape != current.shape:
+            return 1.0
+        import numpy as np
+
+        return np.count_nonzero(np.abs(current - previous) > DIFF_TOLERANCE) / current.size
+    if previous.size != current.size:
+        return 1.0
+    from PIL import ImageChops
+
+    diff = ImageChops.difference(previous, current).point(lambda v: 255 if v > DIFF_TOLERANCE else 0)
+    return diff.histogram()[255] / (current.width * current.height)
+
+
+class IntervalCapture:
+    def __init__(self, engine, interval: float = DEFAULT_INTERVAL_SECONDS, frames: int = 0,
+                 min_change: float = DEFAULT_MIN_CHANGE_PERCENT, on_frame=None):
+        self.engine = engine
+        self.interval = max(0.05, float(interval))
+        self.frames = max(0, int(frames))
+        self.min_change = max(0.0, float(min_change)) / 100
+        self.on_frame = on_frame
+        self.saved = 0
+        self.skipped = 0
+        self.stopped = threading.Event()
+        self._future = None
+        self._wake = None
+
+    def start(self):
+        self.stopped.clear()
+        self._future = self.engine.core.submit(self._run)
+
+    def stop(self, timeout: float = 3):
+        self.stopped.set()
+        core = self.engine.core
+        if self._wake is not None and core.running():
+            core.loop.call_soon_threadsafe(self._wake.set)
+        if self._future is None or core.in_loop():
+            return
+        try:
+            self._future.result(timeout)
+        except Exception:
+            pass
+
+    def running(self) -> bool:
+        return bool(self._future and not self._future.done())
+
+    def _frame(self, previous, kwargs):
+        engine = self.engine
+        img, grab_seconds = grab_frame(**kwargs)
+        signature = diff_signature(img)
+        if changed_fraction(previous, signature) < self.min_change:
+            self.skipped += 1
+            return previous
+        out_path = engine.capture_path("interval")
+        engine.frame_encoder().submit(img, out_path, "interval", grab_seconds, engine.png_compress_level)
+        self.saved += 1
+        return signature
+
+    async def _run(self):
+        engine = self.engine
+        self._wake = asyncio.Event()
+        limit = f"{self.frames} frame(s)" if self.frames else "until stopped"
+        engine.log(f"Interval capture every {self.interval:g}s, {limit}, skipping frames with < {self.min_change * 100:g}% change.")
+        previous = None
+        failures = 0
+        try:
+            try:
+                kwargs = await engine.core.run_limited("capture", grab_kwargs, engine.capture_monitor)
+            except Exception as e:
+                engine.log(f"Interval capture error: {e}")
+                return
+            due = time.monotonic()
+            while not self.stopped.is_set():
+                try:
+                    previous = await engine.core.run_limited("capture", self._frame, previous, kwargs)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    engine.log(f"Interval capture error ({failures}/{MAX_FRAME_FAILURES}): {e}")
+                    if failures >= MAX_FRAME_FAILURES:
+                        engine.log("Interval capture: too many consecutive failures.")
+                        break
+                if self.on_frame:
+                    self.on_frame(self)
+                if self.frames and self.saved + self.skipped >= self.frames:
+                    break
+                due += self.interval
+                now = time.monotonic()
+                if due < now:
+                    due = now
+                try:
+                    await asyncio.wait_for(self._wake.wait(), due - now)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.stopped.set()
+            engine.log(f"Interval capture stopped: {self.saved} saved, {self.skipped} unchanged frame(s) skipped.")
+            if self.on_frame:
+                self.on_frame(self)
@@ -0,0 +1,278 @@
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+
+from organizer_integrity import HASH_ALGORITHM, META_DIR, MANIFEST_NAME, meta_path
+
+CATALOG_NAME = "catalog.sqlite3"
+CATALOG_BATCH = 1000
+SESSION_NAME = re.compile(r"^(\d{4})-(.+?)-(.+)-(\d+)$")
+FTS_COLUMNS = ("name", "session", "project", "audit_type", "year", "url", "title", "selector", "source")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    folder TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    year TEXT,
+    project TEXT,
+    audit_type TEXT,
+    session_index INTEGER,
+    manifest_offset INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    name TEXT NOT NULL,
+    sha256 TEXT,
+    size INTEGER,
+    method TEXT,
+    source TEXT,
+    url TEXT,
+    title TEXT,
+    selector TEXT,
+    modified_at TEXT,
+    recorded_at TEXT,
+    UNIQUE (session_id, name)
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+"""
+
+
+def catalog_path(base_folder: str) -> str:
+    return os.path.join(base_folder, META_DIR, CATALOG_NAME)
+
+
+def session_fields(folder: str) -> dict:
+    name = os.path.basename(os.path.normpath(folder))
+    m = SESSION_NAME.match(name)
+    if not m:
+        return {"name": name, "year": None, "project": None, "audit_type": None, "session_index": None}
+    return {"name": name, "year": m.group(1), "project": m.group(2), "audit_type": m.group(3), "session_index": int(m.group(4))}
+
+
+def fts_query(text: str) -> str:
+    terms = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SessionCatalog:
+    def __init__(self, base_folder: str, log=None):
+        self.base_folder = base_folder
+        self.path = catalog_path(base_folder)
+        self.log = log
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._session_ids = {}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="catalog")
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def add_session(self, folder: str, **fields):
+        self._queue.put(("session", folder, fields))
+
+    def record(self, session_folder: str, record: dict, offset: int):
+        self._queue.put(("record", session_folder, (record, offset)))
+
+    def sync(self, session_folder: str):
+        self._queue.put(("sync", session_folder, None))
+
+    def flush(self, timeout: float = 10):
+        if not (self._thread and self._thread.is_alive()):
+            return
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        done.wait(timeout)
+
+    def _run(self):
+        conn = connect(self.path)
+        conn.executescript(SCHEMA)
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5({', '.join(FTS_COLUMNS)})")
+        conn.commit()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                try:
+                    while len(batch) < CATALOG_BATCH:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                stop = None in batch
+                items = [item for item in batch if item is not None]
+                try:
+                    with conn:
+                        for item in items:
+                            self._apply(conn, *item)
+                except (sqlite3.Error, OSError, ValueError):
+                    self._session_ids = {}
+                    for item in items:
+                        try:
+                            with conn:
+                                self._apply(conn, *item)
+                        except (sqlite3.Error, OSError, ValueError) as e:
+                            if self.log:
+                                self.log(f"Catalog update failed for {os.path.basename(item[1] or '')}: {e}")
+                for op, _, payload in items:
+                    if op == "flush":
+                        payload.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn, op: str, folder: str, payload):
+        if op == "session":
+            self._session_id(conn, folder, payload)
+        elif op == "record":
+            record, offset = payload
+            session_id = self._session_id(conn, folder)
+            stored = conn.execute("SELECT manifest_offset FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+            if offset > stored:
+                self._apply_record(conn, session_id, folder, record)
+                conn.execute("UPDATE sessions SET manifest_offset = ? WHERE id = ?", (offset, session_id))
+        elif op == "sync":
+            self._sync(conn, folder)
+
+    def _session_id(self, conn, folder: str, fields: dict = None) -> int:
+        session_id = self._session_ids.get(folder)
+        if session_id is not None and not fields:
+            return session_id
+        values = session_fields(folder)
+        values.update({k: v for k, v in (fields or {}).items() if v is not None})
+        conn.execute(
+            "INSERT INTO sessions (folder, name, year, project, audit_type, session_index) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (folder) DO UPDATE SET year = excluded.year, project = excluded.project, "
+            "audit_type = excluded.audit_type, session_index = excluded.session_index",
+            (folder, values["name"], values["year"], values["project"], values["audit_type"], values["session_index"]),
+        )
+        session_id = conn.execute("SELECT id FROM sessions WHERE folder = ?", (folder,)).fetchone()[0]
+        self._session_ids[folder] = session_id
+        return session_id
+
+    def _apply_record(self, conn, session_id: int, folder: str, record: dict):
+        name = record["file"]
+        row = conn.execute("SELECT id FROM files WHERE session_id = ? AND name = ?", (session_id, name)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM files_fts WHERE rowid = ?", (row[0],))
+        if record.get("removed"):
+            if row is not None:
+                conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+            return
+
+        values = (
+            record.get(HASH_ALGORITHM),
+            record.get("size"),
+            record.get("method"),
+            record.get("source"),
+            record.get("url"),
+            record.get("title"),
+            record.get("selector"),
+            record.get("modified_at"),
+            record.get("recorded_at"),
+        )
+        if row is None:
+            file_id = conn.execute(
+                "INSERT INTO files (session_id, name, sha256, size, method, source, url, title, selector, modified_at, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, name) + values,
+            ).lastrowid
+        else:
+            file_id = row[0]
+            conn.execute(
+                "UPDATE files SET sha256 = ?, size = ?, method = ?, source = ?, url = ?, title = ?, selector = ?, "
+                "modified_at = ?, recorded_at = ? WHERE id = ?",
+                values + (file_id,),
+            )
+        session = conn.execute("SELECT name, project, audit_type, year FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        conn.execute(
+            f"INSERT INTO files_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (file_id, name, session[0], session[1], session[2], session[3],
+             record.get("url"), record.get("title"), record.get("selector"), record.get("source")),
+        )
+
+    def _sync(self, conn, folder: str):
+        session_id = self._session_id(conn, folder)
+        offset = conn.execute("SELECT manifest_offset FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+        path = meta_path(folder, MANIFEST_NAME)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size < offset:
+                offset = 0
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                raw = raw.strip()
+                if raw:
+                    self._apply_record(conn, session_id, folder, json.loads(raw))
+        conn.execute("UPDATE sessions SET manifest_offset = ? WHERE id = ?", (offset, session_id))
+
+
+def search_catalog(base_folder: str, text: str, limit: int = 50):
+    path = catalog_path(base_folder)
+    if not os.path.exists(path):
+        return []
+    query = fts_query(text)
+    if not query:
+        return []
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT s.folder, f.name, f.method, f.url, f.title, f.selector, f.recorded_at, f.sha256 "
+            "FROM files_fts JOIN files f ON f.id = files_fts.rowid JOIN sessions s ON s.id = f.session_id "
+            "WHERE files_fts MATCH ? ORDER BY files_fts.rowid DESC LIMIT ?",
+            (query, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "path": os.path.join(row["folder"], *row["name"].split("/")),
+            "session": os.path.basename(row["folder"]),
+            "file": row["name"],
+            "method": row["method"],
+            "url": row["url"],
+            "title": row["title"],
+            "selector": row["selector"],
+            "recorded_at": row["recorded_at"],
+            HASH_ALGORITHM: row["sha256"],
+        }
+        for row in rows
+    ]
+
+
+def session_folders(base_folder: str):
+    found = []
+    try:
+        with os.scandir(base_folder) as it:
+            for entry in it:
+                if entry.is_dir() and os.path.exists(meta_path(entry.path, MANIFEST_NAME)):
+                    found.append(entry.path)
+    except FileNotFoundError:
+        pass
+    return sorted(found)
@@ -0,0 +1,163 @@
+import asyncio
+import concurrent.futures
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_LANE_LIMITS = {"capture": 2, "task": 2, "scan": 1}
+
+
+class CoreClosed(RuntimeError):
+    pass
+
+
+class Lane:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.slots = asyncio.Semaphore(self.limit)
+        self.executor = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix=name)
+        self.waiting = 0
+        self.running = 0
+
+
+class AsyncCore:
+    def __init__(self, log=None):
+        self.log = log or (lambda _msg: None)
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._lanes = {}
+        self._tasks = set()
+        self._closing = False
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._closing = False
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), daemon=True, name="organizer-core")
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def lane(self, name: str, limit: int = None) -> Lane:
+        with self._lock:
+            lane = self._lanes.get(name)
+            if limit is None:
+                limit = lane.limit if lane else DEFAULT_LANE_LIMITS.get(name, 1)
+            if lane is None or lane.limit != max(1, int(limit)):
+                old = lane
+                lane = self._lanes[name] = Lane(name, limit)
+                if old is not None:
+                    old.executor.shutdown(wait=False)
+            return lane
+
+    def call_soon(self, fn, *args):
+        if self._closing:
+            raise CoreClosed("Shutting down.")
+        self.start()
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def spawn(self, coro) -> asyncio.Task:
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def submit(self, coro_fn, *args, lane: str = None) -> concurrent.futures.Future:
+        if self._closing:
+            raise CoreClosed("Shutting down.")
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._tracked(self._guarded(lane, coro_fn, *args)), self.loop)
+
+    def run_blocking(self, fn, *args, lane: str = "task") -> concurrent.futures.Future:
+        return self.submit(self.in_lane, lane, fn, *args)
+
+    async def _tracked(self, coro):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            return await coro
+        finally:
+            self._tasks.discard(task)
+
+    async def _guarded(self, lane_name, coro_fn, *args):
+        if lane_name is None:
+            return await coro_fn(*args)
+        lane = self.lane(lane_name)
+        lane.waiting += 1
+        try:
+            await lane.slots.acquire()
+        finally:
+            lane.waiting -= 1
+        lane.running += 1
+        try:
+            return await coro_fn(*args)
+        finally:
+            lane.running -= 1
+            lane.slots.release()
+
+    async def in_lane(self, lane_name: str, fn, *args):
+        lane = self.lane(lane_name)
+        return await self.loop.run_in_executor(lane.executor, fn, *args)
+
+    async def run_limited(self, lane_name: str, fn, *args):
+        return await self._guarded(lane_name, self.in_lane, lane_name, fn, *args)
+
+    def pending(self, lane_name: str = None) -> int:
+        if lane_name is None:
+            return len(self._tasks)
+        lane = self._lanes.get(lane_name)
+        return lane.waiting + lane.running if lane else 0
+
+    def wait_for(self, tasks=None, timeout: float = 5) -> int:
+        if not self.running():
+            return 0
+        if self.in_loop():
+            raise RuntimeError("wait_for cannot be called from the core loop")
+
+        async def wait():
+            found = self._tasks if tasks is None else tasks() if callable(tasks) else tasks
+            live = [t for t in list(found) if not t.done() and t is not asyncio.current_task()]
+            if not live:
+                return 0
+            _, pending = await asyncio.wait(live, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending, timeout=1)
+            return len(pending)
+
+        try:
+            return asyncio.run_coroutine_threadsafe(wait(), self.loop).result(timeout + 2)
+        except concurrent.futures.TimeoutError:
+            return -1
+
+    def shutdown(self, timeout: float = 5):
+        with self._lock:
+            if not self.running():
+                return
+            self._closing = True
+        cancelled = self.wait_for(timeout=timeout)
+        if cancelled > 0:
+            self.log(f"Cancelled {cancelled} unfinished background task(s) at shutdown.")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
+        with self._lock:
+            for lane in self._lanes.values():
+                lane.executor.shutdown(wait=False)
+            self._lanes = {}
+            self._thread = None
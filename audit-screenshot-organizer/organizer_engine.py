@@ -0,0 +1,1045 @@
+import os
+import platform
+import subprocess
+from datetime import datetime
+import threading
+import time
+import re
+import json
+from urllib.parse import urlparse
+
+from organizer_capture import (
+    DEFAULT_ENCODER_WORKERS,
+    DEFAULT_INTERVAL_SECONDS,
+    DEFAULT_MIN_CHANGE_PERCENT,
+    DEFAULT_PNG_COMPRESS_LEVEL,
+)
+from organizer_core import AsyncCore
+from organizer_integrity import TMP_SUFFIX, CustodyManifest, HashIndex, hash_file, session_relpath, verify_session
+from organizer_logging import SessionLogWriter, report_stderr
+from organizer_metrics import (
+    DUPLICATES,
+    FILES_STORED,
+    LANDED_SECONDS,
+    NAVIGATE_SECONDS,
+    PAGE_CAPTURE_SECONDS,
+    PENDING_WRITES,
+    QUEUE_DEPTH,
+    WATCH_EVENTS,
+)
+from organizer_routing import RoutingRules
+from organizer_playwright import DEFAULT_IDLE_CAP, DEFAULT_NAV_TIMEOUT, DEFAULT_WAIT
+from organizer_pipeline import DEFAULT_MOVE_WORKERS, BacklogScanner, MovePipeline, WriteStabilizer
+from organizer_sources import DEFAULT_FILE_PATTERNS, FileFilter, WatchExclusions, folder_key, is_within, watch_roots
+
+DEFAULT_WINDOWS_SCREENSHOT = os.path.join(os.path.expanduser("~"), "Pictures", "Screenshots")
+DEFAULT_SCREENSHOT_FOLDER = DEFAULT_WINDOWS_SCREENSHOT
+DEFAULT_OUTPUT_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "Evidence")
+
+
+class SessionError(Exception):
+    pass
+
+
+class SessionNameIndex:
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._names = set()
+        self._next_suffix = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    self._names.add(entry.name.casefold())
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, filename: str) -> bool:
+        return filename.casefold() in self._names
+
+    def claim(self, filename: str) -> str:
+        with self._lock:
+            key = filename.casefold()
+            if key not in self._names:
+                self._names.add(key)
+                return os.path.join(self.folder, filename)
+            base, ext = os.path.splitext(filename)
+            stem = (base.casefold(), ext.casefold())
+            i = self._next_suffix.get(stem, 1)
+            candidate = f"{base} ({i}){ext}"
+            while candidate.casefold() in self._names:
+                i += 1
+                candidate = f"{base} ({i}){ext}"
+            self._names.add(candidate.casefold())
+            self._next_suffix[stem] = i + 1
+            return os.path.join(self.folder, candidate)
+
+    def add(self, filename: str):
+        with self._lock:
+            self._names.add(filename.casefold())
+
+    def release(self, path: str):
+        with self._lock:
+            self._names.discard(os.path.basename(path).casefold())
+
+
+def open_folder(path: str):
+    if not path or not os.path.isdir(path):
+        return
+    open_with_default_app(path)
+
+
+def open_file(path: str):
+    if not path or not os.path.isfile(path):
+        return
+    open_with_default_app(path)
+
+
+def open_with_default_app(path: str):
+    sysname = platform.system()
+    if sysname == "Darwin":
+        subprocess.run(["open", path], check=False)
+    elif sysname == "Windows":
+        os.startfile(path)
+    else:
+        subprocess.run(["xdg-open", path], check=False)
+
+
+def can_use_imagegrab() -> bool:
+    try:
+        from PIL import ImageGrab
+        return True
+    except Exception:
+        return False
+
+
+def safe_name(s: str) -> str:
+    s = s.strip()
+    s = re.sub(r"[^\w\-\.]+", "_", s)
+    return s[:80] if len(s) > 80 else s
+
+
+def timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+class ScreenshotHandler:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler:
+            handler(event)
+
+    def wanted(self, path: str) -> bool:
+        return self.engine.wants_file(os.path.basename(path)) and not self.engine.watch_excluded(path)
+
+    def on_created(self, event):
+        if self.wanted(event.src_path):
+            WATCH_EVENTS.inc(type="created")
+            self.engine.stabilizer.note(event.src_path)
+
+    def on_modified(self, event):
+        if self.wanted(event.src_path):
+            WATCH_EVENTS.inc(type="modified")
+            self.engine.stabilizer.note(event.src_path)
+
+    def on_closed(self, event):
+        if self.wanted(event.src_path):
+            WATCH_EVENTS.inc(type="closed")
+            self.engine.stabilizer.note(event.src_path, closed=True)
+
+    def on_moved(self, event):
+        self.engine.stabilizer.forget(event.src_path)
+        if self.wanted(event.dest_path):
+            WATCH_EVENTS.inc(type="moved")
+            self.engine.stabilizer.note(event.dest_path)
+
+
+class OrganizerEngine:
+    def __init__(self, log=None):
+        self.year = str(datetime.now().year)
+        self.project = "CSP"
+        self.audit_type = "Annual"
+        self.session_number = 1
+
+        self.screenshot_folder = DEFAULT_SCREENSHOT_FOLDER
+        self.source_folders = []
+        self.watch_recursive = False
+        self.file_patterns = list(DEFAULT_FILE_PATTERNS)
+        self.file_filter = FileFilter(self.file_patterns)
+        self.exclusions = WatchExclusions()
+        self.routing_rules_path = ""
+        self._router = None
+        self.output_base_folder = DEFAULT_OUTPUT_FOLDER
+
+        self.pw_url = "https://example.com"
+        self.pw_fullpage = True
+        self.pw_selector = ""
+        self.pw_pool_size = 2
+        self.pw_concurrency = 4
+        self.pw_timeout = 90.0
+        self.pw_retries = 1
+        self.pw_wait = DEFAULT_WAIT
+        self.pw_idle_cap = DEFAULT_IDLE_CAP
+        self.pw_nav_timeout = DEFAULT_NAV_TIMEOUT
+        self.pw_block = []
+        self.pw_viewports = []
+        self.pw_all_matches = False
+        self._blocker = None
+        self.browser_pool = None
+
+        self.active_session_folder = ""
+        self.observer = None
+        self.running = False
+        self.catchup_enabled = False
+        self.catchup_hours = 24.0
+        self.backlog_scanner = None
+
+        self.log_sink = log
+        self.log_writer = SessionLogWriter(report=self.report)
+        self.move_workers = DEFAULT_MOVE_WORKERS
+        self.move_fsync = False
+        self.move_verify = True
+        self.pipeline = None
+        self.core = AsyncCore(log=self.log)
+        self.stabilizer = WriteStabilizer(self.enqueue_file)
+        self._name_indexes = {}
+        self._hash_indexes = {}
+        self._manifests = {}
+        self._catalogs = {}
+        self.catalog_enabled = True
+        self.dedup_mode = "skip"
+        self.optimize_format = "off"
+        self.optimize_workers = 1
+        self.optimizer = None
+        self.capture_monitor = "primary"
+        self.png_compress_level = DEFAULT_PNG_COMPRESS_LEVEL
+        self.encoder_workers = DEFAULT_ENCODER_WORKERS
+        self.encoder = None
+        self.interval_seconds = DEFAULT_INTERVAL_SECONDS
+        self.interval_frames = 0
+        self.interval_min_change = DEFAULT_MIN_CHANGE_PERCENT
+        self.interval_capture = None
+        self.metrics_port = 0
+        self.metrics_interval = 0.0
+        self.metrics_server = None
+        self.metrics_snapshots = None
+        self._name_index_lock = threading.Lock()
+        self._lazy_lock = threading.Lock()
+
+    def log(self, message: str):
+        now = datetime.now()
+        self.log_writer.write(self.active_session_folder, f"{now.astimezone().isoformat(timespec='milliseconds')} {message}")
+        if self.log_sink:
+            self.log_sink(f"[{now.strftime('%H:%M:%S')}] {message}")
+
+    def report(self, message: str):
+        if self.log_sink:
+            self.log_sink(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+        else:
+            report_stderr(message)
+
+    def start(self):
+        self.log_writer.start()
+        if self.pipeline is None:
+            self.pipeline = MovePipeline(self, workers=self.move_workers)
+        self.pipeline.start()
+        self.stabilizer.start()
+        QUEUE_DEPTH.set_function(self.pending_moves)
+        PENDING_WRITES.set_function(self.stabilizer.pending)
+        self.start_metrics()
+
+    def start_metrics(self):
+        from organizer_metrics import MetricsServer, SnapshotWriter
+
+        if self.metrics_port and self.metrics_server is None:
+            server = MetricsServer(int(self.metrics_port))
+            try:
+                server.start()
+            except OSError as e:
+                self.log(f"Metrics endpoint could not listen on 127.0.0.1:{self.metrics_port}: {e}")
+            else:
+                self.metrics_server = server
+                self.log(f"Metrics: http://127.0.0.1:{server.port}/metrics")
+        if self.metrics_interval and self.metrics_snapshots is None:
+            self.metrics_snapshots = SnapshotWriter(lambda: self.output_base_folder, self.metrics_interval)
+            self.metrics_snapshots.start()
+
+    def stop_metrics(self, timeout: float = 3):
+        if self.metrics_snapshots is not None:
+            self.metrics_snapshots.stop(timeout=timeout)
+            self.metrics_snapshots = None
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def enqueue_file(self, src_path: str):
+        if self.pipeline is None or not self.pipeline.submit(src_path):
+            self.stabilizer.finished(src_path)
+
+    def pending_moves(self) -> int:
+        return self.pipeline.pending() if self.pipeline else 0
+
+    def move_finished(self, src_path: str):
+        self.stabilizer.finished(src_path)
+
+    def shutdown(self, timeout: float = 3):
+        self.stop_watching()
+        self.stop_interval(timeout=timeout)
+        if self.browser_pool is not None:
+            self.browser_pool.shutdown(timeout=timeout)
+            self.browser_pool = None
+        if self.encoder is not None:
+            self.encoder.shutdown()
+            self.encoder = None
+        self.stabilizer.stop(timeout=timeout)
+        if self.pipeline is not None:
+            self.pipeline.stop(timeout=timeout)
+        self.core.shutdown(timeout=timeout)
+        if self.optimizer is not None:
+            self.optimizer.shutdown()
+            self.optimizer = None
+        for catalog in list(self._catalogs.values()):
+            catalog.stop(timeout=timeout)
+        self._catalogs = {}
+        self.stop_metrics(timeout=timeout)
+        self.log_writer.stop(timeout=timeout)
+
+    def timestamp(self) -> str:
+        return timestamp()
+
+    def safe_name(self, s: str) -> str:
+        return safe_name(s)
+
+    def ensure_session(self):
+        if not self.active_session_folder:
+            self.create_session_folder()
+
+    def new_session(self):
+        try:
+            current = int(self.session_number)
+        except Exception:
+            raise SessionError("Start Index must be a number.")
+        self.session_number = max(1, current + 1)
+        self.create_session_folder()
+        self.log(f"Started new session: {self.active_session_folder}")
+
+    def session_folder_name(self) -> str:
+        project = safe_name(str(self.project))
+        audit_type = safe_name(str(self.audit_type))
+        year = safe_name(str(self.year))
+        if not project or not audit_type or not year:
+            raise SessionError("Year, Project, and Audit Type are required.")
+
+        try:
+            session_num = int(self.session_number)
+        except Exception:
+            raise SessionError("Start Index must be a number.")
+        if session_num < 1:
+            session_num = 1
+        self.session_number = session_num
+
+        session_index = str(session_num).zfill(3)
+        return f"{year}-{project}-{audit_type}-{session_index}"
+
+    def create_session_folder(self) -> str:
+        folder_name = self.session_folder_name()
+        session_folder = os.path.join(self.output_base_folder, folder_name)
+        try:
+            os.makedirs(session_folder, exist_ok=True)
+        except Exception as e:
+            raise SessionError(f"Could not create session folder:\n{e}")
+
+        self.active_session_folder = session_folder
+        self.name_index(session_folder)
+        if self.catalog_enabled:
+            catalog = self.catalog(self.output_base_folder)
+            catalog.add_session(
+                session_folder,
+                year=safe_name(str(self.year)),
+                project=safe_name(str(self.project)),
+                audit_type=safe_name(str(self.audit_type)),
+                session_index=self.session_number,
+            )
+            catalog.sync(session_folder)
+        self.log(f"Session folder created: {self.active_session_folder}")
+        return session_folder
+
+    def name_index(self, folder: str) -> SessionNameIndex:
+        index = self._name_indexes.get(folder)
+        if index is None:
+            built = SessionNameIndex(folder)
+            with self._name_index_lock:
+                index = self._name_indexes.setdefault(folder, built)
+        return index
+
+    def claim_path(self, folder: str, filename: str) -> str:
+        return self.name_index(folder).claim(filename)
+
+    def router(self):
+        path = (self.routing_rules_path or "").strip()
+        if not path:
+            return None
+        with self._lazy_lock:
+            if self._router is None or self._router.path != path:
+                self._router = RoutingRules(path, log=self.log)
+            return self._router
+
+    def route_folder(self, session_folder: str, filename: str, method: str, source: str = None, url: str = None) -> str:
+        router = self.router()
+        if router is None:
+            return session_folder
+        subfolder = router.route(filename, method, source=source, url=url,
+                                 extra={"project": safe_name(self.project), "audit_type": safe_name(self.audit_type)})
+        if not subfolder:
+            return session_folder
+        folder = os.path.join(session_folder, *subfolder.split("/"))
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as e:
+            self.log(f"Could not create {subfolder} for {filename}: {e}")
+            return session_folder
+        return folder
+
+    def route_path(self, session_folder: str, filename: str, method: str, source: str = None, url: str = None) -> str:
+        return self.claim_path(self.route_folder(session_folder, filename, method, source=source, url=url), filename)
+
+    def session_for(self, path: str) -> str:
+        folder = self.active_session_folder
+        if folder and is_within(folder_key(path), folder_key(folder)):
+            return folder
+        return os.path.dirname(path)
+
+    def start_watching(self):
+        if self.running:
+            self.log("Watcher already active.")
+            return
+        recursive = bool(self.watch_recursive)
+        roots = self.watch_sources()
+        if not roots:
+            raise SessionError("Choose a screenshot folder to watch.")
+        for folder in roots:
+            if not os.path.isdir(folder):
+                raise SessionError(f"Source folder not found:\n{folder}")
+        output_key = folder_key(self.output_base_folder) if self.output_base_folder else None
+        inside_output = [folder for folder in roots if output_key and is_within(folder_key(folder), output_key)]
+        if recursive and inside_output:
+            raise SessionError(f"Cannot watch subfolders of a source inside the output folder:\n{inside_output[0]}")
+        self.file_filter = FileFilter(self.file_patterns)
+        self.exclusions = WatchExclusions([] if inside_output or not output_key else [self.output_base_folder])
+        from watchdog.observers import Observer
+
+        event_handler = ScreenshotHandler(self)
+        self.observer = Observer()
+        for folder in roots:
+            self.observer.schedule(event_handler, folder, recursive=recursive)
+        self.observer.start()
+        self.running = True
+        self.log(
+            f"Started watching: {', '.join(roots)} "
+            f"({'with subfolders, ' if recursive else ''}{self.file_filter.describe()})"
+        )
+        if self.catchup_enabled:
+            self.start_catchup(roots)
+
+    def watch_sources(self) -> list:
+        return watch_roots([self.screenshot_folder, *self.source_folders], bool(self.watch_recursive))
+
+    def wants_file(self, filename: str) -> bool:
+        return self.file_filter.matches(filename)
+
+    def watch_excluded(self, path: str) -> bool:
+        return self.exclusions.excluded(path)
+
+    def start_catchup(self, folders):
+        max_age = float(self.catchup_hours) * 3600 if self.catchup_hours else None
+        self.backlog_scanner = BacklogScanner(self, folders, max_age_seconds=max_age, recursive=bool(self.watch_recursive))
+        self.backlog_scanner.start()
+
+    def stop_watching(self):
+        if self.backlog_scanner is not None:
+            self.backlog_scanner.cancel()
+            self.backlog_scanner = None
+        if self.observer:
+            try:
+                self.observer.stop()
+                self.observer.join(timeout=3)
+            except Exception:
+                pass
+            self.observer = None
+        if self.running:
+            self.log("Stopped watching.")
+        self.running = False
+
+    def capture_path(self, suffix: str) -> str:
+        self.ensure_session()
+        return self.route_path(self.active_session_folder, f"{self.timestamp()}_{suffix}.png", suffix)
+
+    def run_screencapture(self, args, out_path, method: str = "screencapture") -> bool:
+        try:
+            res = subprocess.run(args, capture_output=True, text=True)
+            ok = os.path.exists(out_path) and os.path.getsize(out_path) > 0 and res.returncode == 0
+            if ok:
+                self.capture_saved(out_path, method)
+                return True
+
+            stderr = (res.stderr or "").strip()
+            if os.path.exists(out_path) and os.path.getsize(out_path) == 0:
+                try:
+                    os.remove(out_path)
+                except Exception:
+                    pass
+
+            if stderr:
+                self.log(f"Capture failed: {stderr}")
+            else:
+                self.log("Capture failed.")
+            return False
+        except Exception as e:
+            self.log(f"Capture error: {e}")
+            return False
+
+    def frame_encoder(self):
+        with self._lazy_lock:
+            if self.encoder is None:
+                from organizer_capture import FrameEncoder
+
+                self.encoder = FrameEncoder(self, workers=self.encoder_workers)
+            return self.encoder
+
+    def grab_screen(self, out_path: str, bbox=None, method: str = "full", all_screens: bool = False, on_saved=None) -> bool:
+        from organizer_capture import grab_frame
+
+        img, grab_seconds = grab_frame(bbox=bbox, all_screens=all_screens)
+        self.frame_encoder().submit(img, out_path, method, grab_seconds, self.png_compress_level, on_saved)
+        return True
+
+    def capture_saved(self, path: str, method: str):
+        if self.file_landed(path, method):
+            self.log(f"Saved: {os.path.basename(path)}")
+
+    def hash_index(self, session_folder: str) -> HashIndex:
+        index = self._hash_indexes.get(session_folder)
+        if index is None:
+            built = HashIndex(session_folder)
+            with self._lazy_lock:
+                index = self._hash_indexes.setdefault(session_folder, built)
+        return index
+
+    def manifest(self, session_folder: str) -> CustodyManifest:
+        manifest = self._manifests.get(session_folder)
+        if manifest is None:
+            built = CustodyManifest(session_folder, on_append=self.catalog_append)
+            with self._lazy_lock:
+                manifest = self._manifests.setdefault(session_folder, built)
+        return manifest
+
+    def catalog(self, base_folder: str):
+        catalog = self._catalogs.get(base_folder)
+        if catalog is None:
+            from organizer_catalog import SessionCatalog
+
+            built = SessionCatalog(base_folder, log=self.log)
+            with self._lazy_lock:
+                catalog = self._catalogs.setdefault(base_folder, built)
+            if catalog is built:
+                catalog.start()
+        return catalog
+
+    def catalog_append(self, session_folder: str, record: dict, offset: int):
+        if self.catalog_enabled:
+            self.catalog(os.path.dirname(session_folder)).record(session_folder, record, offset)
+
+    def search_catalog(self, text: str, limit: int = 50):
+        from organizer_catalog import search_catalog
+
+        for catalog in list(self._catalogs.values()):
+            catalog.flush()
+        t0 = time.perf_counter()
+        results = search_catalog(self.output_base_folder, text, limit=limit)
+        self.log(f"Search {text!r}: {len(results)} result(s) in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return results
+
+    def reindex_catalog(self) -> int:
+        from organizer_catalog import session_folders
+
+        catalog = self.catalog(self.output_base_folder)
+        folders = session_folders(self.output_base_folder)
+        for folder in folders:
+            catalog.sync(folder)
+        catalog.flush()
+        self.log(f"Catalog: indexed {len(folders)} session(s) under {self.output_base_folder}")
+        return len(folders)
+
+    def file_landed(self, path: str, method: str, session_folder: str = None, source: str = None, digest: str = None, extra: dict = None):
+        session_folder = session_folder or self.session_for(path)
+        t0 = time.perf_counter()
+        try:
+            digest = digest or hash_file(path)
+        except OSError as e:
+            self.log(f"Could not hash {os.path.basename(path)}: {e}")
+            return path
+
+        name = session_relpath(path, session_folder)
+        linked_to = None
+        existing = None
+        if self.dedup_mode != "keep":
+            existing = self.hash_index(session_folder).claim(digest, name)
+
+        if existing and self.dedup_mode == "link":
+            existing_path = os.path.join(session_folder, existing)
+            tmp_path = f"{path}{TMP_SUFFIX}"
+            try:
+                os.link(existing_path, tmp_path)
+                os.replace(tmp_path, path)
+                linked_to = existing
+                DUPLICATES.inc(action="link")
+                self.log(f"Duplicate of {existing}: hard-linked {name}")
+            except OSError as e:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                self.log(f"Duplicate of {existing}: hard link failed ({e}); kept {name}")
+        elif existing:
+            try:
+                os.remove(path)
+            except OSError as e:
+                self.log(f"Duplicate of {existing}: could not remove {name}: {e}")
+            else:
+                self.name_index(os.path.dirname(path)).release(path)
+                DUPLICATES.inc(action="skip")
+                self.log(f"Duplicate of {existing}: skipped {os.path.basename(source or path)}")
+                return None
+
+        try:
+            self.manifest(session_folder).record(path, digest, method, source=source, linked_to=linked_to, extra=extra)
+        except OSError as e:
+            self.log(f"Could not record {name} in the session manifest: {e}")
+        LANDED_SECONDS.observe(time.perf_counter() - t0)
+        FILES_STORED.inc(method=method)
+        if self.optimize_format != "off" and not linked_to and path.lower().endswith(".png"):
+            self.image_optimizer().submit(path, session_folder, digest)
+        return path
+
+    def image_optimizer(self):
+        with self._lazy_lock:
+            if self.optimizer is None or self.optimizer.fmt != self.optimize_format or self.optimizer.workers != self.optimize_workers:
+                from organizer_optimize import ImageOptimizer
+
+                if self.optimizer is not None:
+                    threading.Thread(target=self.optimizer.shutdown, daemon=True).start()
+                self.optimizer = ImageOptimizer(self, fmt=self.optimize_format, workers=self.optimize_workers)
+            return self.optimizer
+
+    def verify_session(self, session_folder: str = None, workers: int = None) -> dict:
+        session_folder = session_folder or self.active_session_folder
+        if not session_folder or not os.path.isdir(session_folder):
+            raise SessionError(f"Session folder not found:\n{session_folder}")
+        self.log(f"Verifying {session_folder}…")
+        report = verify_session(session_folder, workers=workers)
+        self.log(
+            f"Verified {report['files']} file(s), {report['bytes'] / 1e6:.1f} MB in {report['seconds']:.1f}s "
+            f"({report['mb_per_second']} MB/s, {report['workers']} thread(s)). Root: {report['root']}"
+        )
+        if report["intact"]:
+            self.log("Session matches its manifest.")
+        else:
+            for label in ("modified", "missing", "untracked"):
+                if report[label]:
+                    self.log(f"{label.capitalize()} ({len(report[label])}): {', '.join(report[label][:10])}")
+        return report
+
+    def near_duplicates(self, session_folder: str = None, max_distance: int = None, workers: int = None, move: bool = False) -> dict:
+        session_folder = session_folder or self.active_session_folder
+        if not session_folder or not os.path.isdir(session_folder):
+            raise SessionError(f"Session folder not found:\n{session_folder}")
+        try:
+            import numpy
+        except ImportError:
+            raise SessionError("Near-duplicate search requires NumPy. Install with: pip install numpy")
+        from organizer_similar import DEFAULT_MAX_DISTANCE, DUPLICATES_DIR, find_near_duplicates
+
+        max_distance = DEFAULT_MAX_DISTANCE if max_distance is None else max(0, int(max_distance))
+        self.log(f"Looking for near-duplicates in {session_folder}…")
+        report = find_near_duplicates(session_folder, max_distance=max_distance, workers=workers)
+        self.log(
+            f"Hashed {report['hashed']} image(s) ({report['cached']} cached) in {report['hash_seconds']:.1f}s; "
+            f"{len(report['groups'])} group(s), {report['extras']} near-duplicate(s) within {max_distance} bits."
+        )
+        for label in report["failed"][:10]:
+            self.log(f"Could not read image: {label}")
+        if move and report["extras"]:
+            report["moved"] = self.move_near_duplicates(report)
+            report["moved_to"] = DUPLICATES_DIR
+
+        report_path = self.claim_path(session_folder, f"{self.timestamp()}_near_duplicates.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.manifest(session_folder).record(report_path, hash_file(report_path), "near_duplicates")
+        self.log(f"Near-duplicate report: {os.path.basename(report_path)}")
+        return report
+
+    def move_near_duplicates(self, report: dict) -> int:
+        from organizer_similar import DUPLICATES_DIR
+
+        session_folder = report["session"]
+        dup_folder = os.path.join(session_folder, DUPLICATES_DIR)
+        os.makedirs(dup_folder, exist_ok=True)
+        manifest = self.manifest(session_folder)
+        moved = 0
+        for group in report["groups"]:
+            for dup in group["duplicates"]:
+                src = os.path.join(session_folder, *dup["file"].split("/"))
+                dest = self.claim_path(dup_folder, os.path.basename(src))
+                try:
+                    os.replace(src, dest)
+                except OSError as e:
+                    self.name_index(dup_folder).release(dest)
+                    self.log(f"Could not move {dup['file']}: {e}")
+                    continue
+                self.name_index(os.path.dirname(src)).release(src)
+                new_name = session_relpath(dest, session_folder)
+                digest = hash_file(dest)
+                self.hash_index(session_folder).claim(digest, new_name)
+                manifest.record(dest, digest, "near_duplicate", extra={"moved_from": dup["file"], "near_duplicate_of": group["keep"]})
+                manifest.record_removal(dup["file"], replaced_by=new_name)
+                moved += 1
+        self.log(f"Moved {moved} near-duplicate(s) to {DUPLICATES_DIR}.")
+        return moved
+
+    def export_sessions(self, archive_path: str, session_folders=None, workers: int = None) -> dict:
+        session_folders = session_folders or [self.active_session_folder]
+        for folder in session_folders:
+            if not folder or not os.path.isdir(folder):
+                raise SessionError(f"Session folder not found:\n{folder}")
+        from organizer_export import export_sessions
+
+        self.log(f"Exporting {len(session_folders)} session(s) to {archive_path}…")
+        try:
+            report = export_sessions(session_folders, archive_path, workers=workers, log=self.log)
+        except FileExistsError as e:
+            raise SessionError(str(e))
+        resumed = f", {report['resumed']} resumed" if report["resumed"] else ""
+        self.log(
+            f"Exported {report['files']} file(s){resumed}, {report['bytes'] / 1e6:.1f} MB → "
+            f"{report['archive_bytes'] / 1e6:.1f} MB in {report['seconds']:.1f}s ({report['mb_per_second']} MB/s)"
+        )
+        for name, info in report["sessions"].items():
+            self.log(f"{name}: {info['files']} file(s), root {info['root']}")
+        return report
+
+    def capture_full(self, on_saved=None) -> bool:
+        out_path = self.capture_path("full")
+        if platform.system() == "Darwin":
+            args = ["screencapture", "-x"]
+            if str(self.capture_monitor).isdigit():
+                args += ["-D", str(self.capture_monitor)]
+            ok = self.run_screencapture(args + [out_path], out_path, method="full")
+            if on_saved:
+                on_saved(ok)
+            return ok
+        if not can_use_imagegrab():
+            self.log("Full screen capture requires Pillow. Install with: pip install pillow")
+            return False
+        try:
+            from organizer_capture import grab_kwargs
+
+            return self.grab_screen(out_path, method="full", on_saved=on_saved, **grab_kwargs(self.capture_monitor))
+        except Exception as ex:
+            self.name_index(os.path.dirname(out_path)).release(out_path)
+            self.log(f"Full capture error: {ex}")
+            return False
+
+    def start_interval(self, on_frame=None) -> bool:
+        if self.interval_capture is not None and self.interval_capture.running():
+            self.log("Interval capture already running.")
+            return False
+        if not can_use_imagegrab():
+            self.log("Interval capture requires Pillow. Install with: pip install pillow")
+            return False
+        self.ensure_session()
+        from organizer_capture import IntervalCapture
+
+        self.interval_capture = IntervalCapture(
+            self,
+            interval=self.interval_seconds,
+            frames=self.interval_frames,
+            min_change=self.interval_min_change,
+            on_frame=on_frame,
+        )
+        self.interval_capture.start()
+        return True
+
+    def stop_interval(self, timeout: float = 3):
+        if self.interval_capture is not None:
+            self.interval_capture.stop(timeout=timeout)
+            self.interval_capture = None
+
+    def playwright_pool(self):
+        if self.browser_pool is None:
+            from organizer_playwright import BrowserPool
+
+            self.browser_pool = BrowserPool(self.core, log=self.log, size=self.pw_pool_size)
+        return self.browser_pool
+
+    def warm_playwright(self):
+        try:
+            import playwright
+        except ImportError:
+            return
+
+        def done(fut):
+            if fut.cancelled():
+                return
+            err = fut.exception()
+            if err:
+                self.log(f"Playwright warm-up failed: {err}")
+
+        self.playwright_pool().warm_up().add_done_callback(done)
+
+    def request_blocker(self):
+        from organizer_playwright import RequestBlocker
+
+        entries = tuple(self.pw_block or ())
+        if self._blocker is None or self._blocker[0] != entries:
+            self._blocker = (entries, RequestBlocker(entries))
+        return self._blocker[1]
+
+    def page_capture_job(self, url: str, fullpage: bool, selectors, session_folder: str, prefix: str = "", wait=None,
+                         viewports=None, all_matches=None):
+        import asyncio
+        from organizer_playwright import (
+            ELEMENT_TIMEOUT,
+            describe_wait,
+            parse_selectors,
+            parse_viewports,
+            parse_wait,
+            settle_layout,
+            viewport_name,
+            wait_ready,
+        )
+
+        selectors = parse_selectors(selectors)
+        steps = wait or parse_wait(self.pw_wait)
+        sizes = parse_viewports(self.pw_viewports if viewports is None else viewports) or [None]
+        every = self.pw_all_matches if all_matches is None else all_matches
+        blocker = self.request_blocker()
+        nav_timeout = self.pw_nav_timeout
+        idle_cap = self.pw_idle_cap
+
+        async def capture(page):
+            blocked = await blocker.attach(page) if blocker else None
+            try:
+                return await shoot(page)
+            finally:
+                if blocked:
+                    kinds = ", ".join(f"{kind} {n}" for kind, n in sorted(blocked.items()))
+                    self.log(f"Playwright: blocked {sum(blocked.values())} request(s) on {url} ({kinds})")
+
+        async def store(saved, filename, extra, shot, **kwargs):
+            path = self.route_path(session_folder, f"{self.timestamp()}_{filename}", "playwright", url=extra["url"])
+            try:
+                await shot(path=path, **kwargs)
+            except BaseException:
+                self.name_index(os.path.dirname(path)).release(path)
+                raise
+            if await asyncio.to_thread(self.file_landed, path, "playwright", session_folder, extra=extra):
+                self.log(f"Saved: {os.path.basename(path)}")
+                saved.append(path)
+
+        async def shoot(page):
+            t0 = time.perf_counter()
+            timings = await wait_ready(page, url, steps, nav_timeout, idle_cap)
+            t_nav = time.perf_counter()
+            saved = []
+            missing = []
+            errors = []
+            meta = {"url": page.url or url, "title": await page.title(), "wait": describe_wait(steps)}
+            for size in sizes:
+                tag = ""
+                extra = meta
+                if size is not None:
+                    await page.set_viewport_size({"width": size[0], "height": size[1]})
+                    await settle_layout(page)
+                    tag = f"{viewport_name(size)}_"
+                    extra = dict(meta, viewport=viewport_name(size))
+                at = f" at {viewport_name(size)}" if size is not None else ""
+                if fullpage:
+                    try:
+                        await store(saved, f"{prefix}{tag}fullpage.png", extra, page.screenshot, full_page=True)
+                    except Exception as e:
+                        missing.append(f"full page{at}")
+                        errors.append(e)
+                        self.log(f"Playwright: full page capture failed on {url}{at}: {e}")
+                for selector in selectors:
+                    locator = page.locator(selector)
+                    if every:
+                        count = await locator.count()
+                        targets = [(locator.nth(i), f"_{i + 1:02d}") for i in range(count)]
+                    else:
+                        targets = [(locator.first, "")]
+                    if not targets:
+                        missing.append(f"{selector}{at}")
+                        self.log(f"Playwright: no match for {selector} on {url}{at}")
+                        continue
+                    for target, suffix in targets:
+                        try:
+                            await store(saved, f"{prefix}{tag}element_{safe_name(selector)}{suffix}.png", dict(extra, selector=selector),
+                                        target.screenshot, timeout=ELEMENT_TIMEOUT * 1000)
+                        except Exception as e:
+                            missing.append(f"{selector}{suffix}{at}")
+                            errors.append(e)
+                            self.log(f"Playwright: could not capture {selector}{suffix} on {url}{at}: {e}")
+
+            t_done = time.perf_counter()
+            NAVIGATE_SECONDS.observe(t_nav - t0)
+            PAGE_CAPTURE_SECONDS.observe(t_done - t_nav)
+            ready = ", ".join(f"{label} {int(seconds * 1000)} ms" for label, seconds in timings)
+            shots = f"{len(saved)} shot(s)" + (f" at {len(sizes)} viewports" if len(sizes) > 1 else "")
+            self.log(f"Playwright timings: {ready}, capture {int((t_done - t_nav) * 1000)} ms for {shots} ({url})")
+            if errors and not saved:
+                raise errors[0]
+            return {"files": saved, "missing": missing}
+
+        return capture
+
+    def run_playwright_capture(self):
+        try:
+            url = self.pw_url.strip()
+            if not url:
+                self.log("Playwright: URL is empty.")
+                return
+            if not re.match(r"^https?://", url, flags=re.IGNORECASE):
+                url = f"https://{url}"
+
+            from organizer_playwright import parse_selectors
+
+            fullpage = bool(self.pw_fullpage)
+            selectors = parse_selectors(self.pw_selector)
+            if not fullpage and not selectors:
+                self.log("Playwright: nothing to capture. Enable full page or provide a selector.")
+                return
+
+            self.ensure_session()
+            job = self.page_capture_job(url, fullpage, selectors, self.active_session_folder)
+            result = self.playwright_pool().run(job)
+            if result["missing"]:
+                self.log(f"Playwright: {len(result['files'])} saved, not captured: {', '.join(result['missing'])}")
+
+        except Exception as e:
+            self.log(f"Playwright error: {e}")
+
+    def run_batch_capture(self, list_path: str):
+        import asyncio
+        import concurrent.futures
+
+        try:
+            from organizer_playwright import describe_wait, parse_viewports, parse_wait, read_url_list, viewport_name
+
+            items = read_url_list(list_path)
+            default_wait = parse_wait(self.pw_wait)
+            default_viewports = parse_viewports(self.pw_viewports)
+        except Exception as e:
+            self.log(f"Batch: could not read URL list: {e}")
+            return None
+        if not items:
+            self.log("Batch: URL list is empty.")
+            return None
+
+        fullpage = bool(self.pw_fullpage)
+        if not fullpage and not all(spec.selectors for spec in items):
+            self.log("Batch: full page is off, so every line needs a selector.")
+            return None
+
+        self.ensure_session()
+        session_folder = self.active_session_folder
+        pool = self.playwright_pool()
+        pool.resize(self.pw_concurrency)
+        blocker = self.request_blocker()
+        self.log(
+            f"Batch: capturing {len(items)} URLs, {pool.size} at a time, ready on {describe_wait(default_wait)}"
+            + (f", blocking {blocker.describe()}." if blocker else ".")
+        )
+
+        t0 = time.perf_counter()
+        pending = []
+        for n, spec in enumerate(items, start=1):
+            host = safe_name(urlparse(spec.url).hostname or "page")
+            wait = spec.wait or default_wait
+            viewports = default_viewports if spec.viewports is None else spec.viewports
+            job = self.page_capture_job(spec.url, fullpage, spec.selectors, session_folder, prefix=f"{n:03d}_{host}_",
+                                        wait=wait, viewports=viewports, all_matches=spec.all_matches)
+            state = {"attempts": 0, "started": None, "finished": None}
+
+            async def counted(page, job=job, state=state):
+                state["attempts"] += 1
+                if state["started"] is None:
+                    state["started"] = time.perf_counter()
+                try:
+                    return await job(page)
+                finally:
+                    state["finished"] = time.perf_counter()
+
+            fut = pool.submit(counted, timeout=self.pw_timeout, retries=self.pw_retries)
+            pending.append((spec, wait, viewports, state, fut))
+
+        results = []
+        for spec, wait, viewports, state, fut in pending:
+            url = spec.url
+            record = {"url": url, "selector": "; ".join(spec.selectors), "wait": describe_wait(wait)}
+            if viewports:
+                record["viewports"] = [viewport_name(size) for size in viewports]
+            try:
+                result = fut.result()
+                record["files"] = [os.path.basename(p) for p in result["files"]]
+                record["status"] = "partial" if result["missing"] else "ok"
+                if result["missing"]:
+                    record["missing"] = result["missing"]
+                    self.log(f"Batch: partial {url}: not captured {', '.join(result['missing'])}")
+            except Exception as e:
+                record["status"] = "failed"
+                timed_out = isinstance(e, (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError))
+                record["error"] = f"timed out after {self.pw_timeout:g}s" if timed_out else str(e)
+                self.log(f"Batch: failed {url}: {record['error']}")
+            record["attempts"] = state["attempts"]
+            if state["started"] is not None and state["finished"] is not None:
+                record["seconds"] = round(state["finished"] - state["started"], 3)
+            results.append(record)
+
+        elapsed = time.perf_counter() - t0
+        ok = sum(1 for r in results if r["status"] == "ok")
+        partial = sum(1 for r in results if r["status"] == "partial")
+        summary = {
+            "list": os.path.abspath(list_path),
+            "session": session_folder,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "concurrency": pool.size,
+            "timeout": self.pw_timeout,
+            "retries": self.pw_retries,
+            "wait": describe_wait(default_wait),
+            "blocked": list(self.pw_block or ()),
+            "viewports": [viewport_name(size) for size in default_viewports],
+            "total": len(results),
+            "ok": ok,
+            "partial": partial,
+            "failed": len(results) - ok - partial,
+            "shots": sum(len(r.get("files", ())) for r in results),
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_per_minute": round(len(results) / elapsed * 60, 1) if elapsed > 0 else 0.0,
+            "results": results,
+        }
+        summary_path = self.claim_path(session_folder, f"{self.timestamp()}_batch_summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self.manifest(session_folder).record(summary_path, hash_file(summary_path), "batch_summary", source=os.path.abspath(list_path))
+        self.log(
+            f"Batch: {ok}/{len(results)} captured" + (f", {partial} partial" if partial else "")
+            + f", {summary['shots']} shot(s) in {elapsed:.1f}s "
+            f"({summary['pages_per_minute']} pages/min). Summary: {os.path.basename(summary_path)}"
+        )
+        return summary
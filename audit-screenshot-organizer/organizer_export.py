@@ -0,0 +1,406 @@
+import getpass
+import io
+import json
+import os
+import platform
+import struct
+import tarfile
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer_integrity import HASH_ALGORITHM, META_DIR, READ_CHUNK, TMP_SUFFIX, local_iso, merkle_root, new_hasher
+
+EXPORT_FORMATS = ("zip", "tar")
+STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".zip", ".gz", ".7z", ".mp4")
+CHECKPOINT_SUFFIX = ".checkpoint"
+CHECKPOINT_INTERVAL = 1.0
+DEFLATE_LEVEL = 6
+SPOOL_MAX = 16 * 1024 * 1024
+SNAPSHOT_MAX = 64 * 1024 * 1024
+SUMS_NAME = "EXPORT-SHA256SUMS"
+EXPORT_MANIFEST_NAME = "export-manifest.json"
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FLAGS = 0x08 | 0x800
+
+
+def export_format(archive_path: str) -> str:
+    return "tar" if archive_path.lower().endswith(".tar") else "zip"
+
+
+def export_sources(session_folders, archive_path: str):
+    skip = {os.path.abspath(archive_path), os.path.abspath(archive_path + CHECKPOINT_SUFFIX)}
+    found = []
+    for session_folder in session_folders:
+        session_folder = os.path.abspath(session_folder)
+        prefix = os.path.basename(session_folder)
+        stack = [session_folder]
+        while stack:
+            folder = stack.pop()
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(TMP_SUFFIX) and entry.path not in skip:
+                    st = entry.stat()
+                    rel = os.path.relpath(entry.path, session_folder).replace(os.sep, "/")
+                    found.append((entry.path, f"{prefix}/{rel}", st.st_size, st.st_mtime_ns, st.st_mode))
+    return found
+
+
+def dos_datetime(mtime_ns: int):
+    t = time.localtime(max(mtime_ns / 1e9, 315532800))
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class PreparedMember:
+    __slots__ = ("crc", "size", "compressed_size", "digest", "spool")
+
+    def __init__(self, crc, size, compressed_size, digest, spool):
+        self.crc = crc
+        self.size = size
+        self.compressed_size = compressed_size
+        self.digest = digest
+        self.spool = spool
+
+
+def deflate_member(path: str, spool_dir: str) -> PreparedMember:
+    h = new_hasher()
+    crc = 0
+    size = 0
+    comp = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX, dir=spool_dir)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            spool.write(comp.compress(chunk))
+    spool.write(comp.flush())
+    compressed_size = spool.tell()
+    spool.seek(0)
+    return PreparedMember(crc, size, compressed_size, h.hexdigest(), spool)
+
+
+class ZipStreamWriter:
+    def __init__(self, f, entries=None):
+        self.f = f
+        self.entries = list(entries or [])
+
+    def _local_header(self, name: bytes, method: int, dostime: int, dosdate: int, zip64: bool):
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if zip64 else b""
+        size_field = ZIP64_LIMIT if zip64 else 0
+        self.f.write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 45 if zip64 else 20, ZIP_FLAGS, method, dostime, dosdate,
+            0, size_field, size_field, len(name), len(extra),
+        ))
+        self.f.write(name)
+        self.f.write(extra)
+
+    def add(self, arcname: str, mode: int, mtime_ns: int, method: int, stat_size: int, write_data):
+        name = arcname.encode("utf-8")
+        offset = self.f.tell()
+        dostime, dosdate = dos_datetime(mtime_ns)
+        zip64 = stat_size >= ZIP64_LIMIT - (1 << 20)
+        self._local_header(name, method, dostime, dosdate, zip64)
+        crc, size, compressed_size, digest = write_data(self.f)
+        if zip64:
+            self.f.write(struct.pack("<IIQQ", 0x08074B50, crc, compressed_size, size))
+        else:
+            self.f.write(struct.pack("<IIII", 0x08074B50, crc, compressed_size, size))
+        entry = {
+            "name": arcname, "method": method, "crc": crc, "size": size, "compressed_size": compressed_size,
+            "offset": offset, "time": dostime, "date": dosdate, "mode": mode, "zip64": zip64, HASH_ALGORITHM: digest,
+        }
+        self.entries.append(entry)
+        return entry
+
+    def finish(self):
+        cd_start = self.f.tell()
+        for e in self.entries:
+            name = e["name"].encode("utf-8")
+            fields = []
+            size, compressed_size, offset = e["size"], e["compressed_size"], e["offset"]
+            if size >= ZIP64_LIMIT:
+                fields.append(size)
+                size = ZIP64_LIMIT
+            if compressed_size >= ZIP64_LIMIT:
+                fields.append(compressed_size)
+                compressed_size = ZIP64_LIMIT
+            if offset >= ZIP64_LIMIT:
+                fields.append(offset)
+                offset = ZIP64_LIMIT
+            extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+            needed = 45 if fields or e["zip64"] else 20
+            self.f.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 45, needed, ZIP_FLAGS, e["method"], e["time"], e["date"],
+                e["crc"], compressed_size, size, len(name), len(extra), 0, 0, 0, (e["mode"] & 0xFFFF) << 16, offset,
+            ))
+            self.f.write(name)
+            self.f.write(extra)
+        cd_end = self.f.tell()
+        count = len(self.entries)
+        cd_size = cd_end - cd_start
+        if count >= 0xFFFF or cd_start >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            self.f.write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, (3 << 8) | 45, 45, 0, 0, count, count, cd_size, cd_start))
+            self.f.write(struct.pack("<IIQI", 0x07064B50, 0, cd_end, 1))
+            self.f.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, 0xFFFF, 0xFFFF, ZIP64_LIMIT, ZIP64_LIMIT, 0))
+        else:
+            self.f.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, cd_size, cd_start, 0))
+
+
+class HashingReader:
+    def __init__(self, f):
+        self.f = f
+        self.hasher = new_hasher()
+
+    def read(self, n=-1):
+        data = self.f.read(n)
+        self.hasher.update(data)
+        return data
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+
+    def load(self, header: dict):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        try:
+            if not lines or json.loads(lines[0]) != header:
+                return None
+        except ValueError:
+            return None
+        done = []
+        for line in lines[1:]:
+            try:
+                done.append(json.loads(line))
+            except ValueError:
+                break
+        return done
+
+    def start(self, header: dict, done):
+        self._f = open(self.path, "w", encoding="utf-8")
+        self._f.write(json.dumps(header, sort_keys=True) + "\n")
+        for entry in done:
+            self.add(entry)
+        self.sync()
+
+    def add(self, entry: dict):
+        self._f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self, remove: bool):
+        if self._f:
+            self._f.close()
+            self._f = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def export_sessions(session_folders, archive_path: str, workers: int = None, log=None) -> dict:
+    t0 = time.perf_counter()
+    log = log or (lambda _msg: None)
+    archive_path = os.path.abspath(archive_path)
+    fmt = export_format(archive_path)
+    session_folders = [os.path.abspath(f) for f in session_folders]
+    workers = workers or os.cpu_count() or 1
+    sources = export_sources(session_folders, archive_path)
+
+    header = {"archive": archive_path, "format": fmt, "sessions": session_folders}
+    checkpoint = Checkpoint(archive_path + CHECKPOINT_SUFFIX)
+    done = None
+    if os.path.exists(archive_path):
+        done = checkpoint.load(header)
+        if done is None:
+            raise FileExistsError(f"{archive_path} already exists.")
+        written = os.path.getsize(archive_path)
+        while done and done[-1]["end"] > written:
+            done.pop()
+        by_name = {arcname: (size, mtime_ns) for _, arcname, size, mtime_ns, _ in sources}
+        changed = [e["name"] for e in done if by_name.get(e["name"]) != (e["source_size"], e["source_mtime_ns"])]
+        if changed:
+            log(f"Export: {len(changed)} file(s) changed since the interrupted export; starting over.")
+            done = []
+
+    resume_offset = done[-1]["end"] if done else 0
+    completed = {e["name"] for e in done or ()}
+    pending = [s for s in sources if s[1] not in completed]
+    if done:
+        log(f"Export: resuming after {len(done)} file(s), {len(pending)} left.")
+
+    checkpoint.start(header, done or ())
+    spool_dir = os.path.dirname(archive_path)
+    total_bytes = 0
+    f = open(archive_path, "r+b" if done else "wb")
+    try:
+        f.truncate(resume_offset)
+        f.seek(resume_offset)
+        if fmt == "zip":
+            writer = ZipStreamWriter(f, [e for e in done or ()])
+        else:
+            writer = tarfile.open(fileobj=f, mode="w", format=tarfile.PAX_FORMAT)
+        entries = list(done or ())
+        last_sync = time.monotonic()
+
+        def record(entry, size, mtime_ns):
+            nonlocal last_sync
+            entry["source_size"] = size
+            entry["source_mtime_ns"] = mtime_ns
+            entry["end"] = f.tell()
+            if fmt == "tar":
+                entries.append(entry)
+            checkpoint.add(entry)
+            if time.monotonic() - last_sync >= CHECKPOINT_INTERVAL:
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint.sync()
+                last_sync = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as pool:
+            window = deque()
+            it = iter(pending)
+
+            def fill():
+                while len(window) < workers * 4:
+                    item = next(it, None)
+                    if item is None:
+                        return
+                    stored = item[0].lower().endswith(STORED_EXTENSIONS)
+                    fut = None if stored or fmt == "tar" else pool.submit(deflate_member, item[0], spool_dir)
+                    window.append((item, fut))
+
+            fill()
+            while window:
+                (path, arcname, size, mtime_ns, mode), fut = window.popleft()
+                fill()
+                if fmt == "tar":
+                    with open(path, "rb") as src:
+                        st = os.fstat(src.fileno())
+                        size, mtime_ns = st.st_size, st.st_mtime_ns
+                        if f"/{META_DIR}/" in arcname and size <= SNAPSHOT_MAX:
+                            data = src.read()
+                            size = len(data)
+                            reader = HashingReader(io.BytesIO(data))
+                        else:
+                            reader = HashingReader(src)
+                        info = tarfile.TarInfo(arcname)
+                        info.size = size
+                        info.mtime = mtime_ns / 1e9
+                        info.mode = mode & 0o7777
+                        writer.addfile(info, reader)
+                    record({"name": arcname, "size": size, HASH_ALGORITHM: reader.hasher.hexdigest()}, size, mtime_ns)
+                    total_bytes += size
+                    continue
+
+                if fut is None:
+                    def write_stored(out, path=path):
+                        h = new_hasher()
+                        crc = 0
+                        n = 0
+                        with open(path, "rb") as src:
+                            while True:
+                                chunk = src.read(READ_CHUNK)
+                                if not chunk:
+                                    break
+                                h.update(chunk)
+                                crc = zlib.crc32(chunk, crc)
+                                n += len(chunk)
+                                out.write(chunk)
+                        return crc, n, n, h.hexdigest()
+
+                    entry = writer.add(arcname, mode, mtime_ns, 0, size, write_stored)
+                else:
+                    prepared = fut.result()
+
+                    def write_deflated(out, prepared=prepared):
+                        with prepared.spool:
+                            while True:
+                                chunk = prepared.spool.read(READ_CHUNK)
+                                if not chunk:
+                                    break
+                                out.write(chunk)
+                        return prepared.crc, prepared.size, prepared.compressed_size, prepared.digest
+
+                    entry = writer.add(arcname, mode, mtime_ns, 8, size, write_deflated)
+                record(entry, size, mtime_ns)
+                total_bytes += entry["size"]
+
+        if fmt == "zip":
+            entries = writer.entries
+        listing = [(e["name"], e[HASH_ALGORITHM], e["size"]) for e in entries]
+        sums = "".join(f"{digest}  {name}\n" for name, digest, _ in listing).encode("utf-8")
+        roots = {}
+        for session_folder in session_folders:
+            prefix = os.path.basename(session_folder) + "/"
+            leaves = [
+                (name[len(prefix):], digest) for name, digest, _ in listing
+                if name.startswith(prefix) and not name[len(prefix):].startswith(f"{META_DIR}/")
+            ]
+            roots[os.path.basename(session_folder)] = {"files": len(leaves), "root": merkle_root(leaves)}
+        manifest = json.dumps({
+            "created_at": local_iso(),
+            "host": platform.node(),
+            "user": getpass.getuser(),
+            "sessions": roots,
+            "files": [{"file": name, HASH_ALGORITHM: digest, "size": n} for name, digest, n in listing],
+        }, indent=2).encode("utf-8")
+
+        now_ns = time.time_ns()
+        for name, data in ((SUMS_NAME, sums), (EXPORT_MANIFEST_NAME, manifest)):
+            if fmt == "zip":
+                def write_bytes(out, data=data):
+                    out.write(data)
+                    return zlib.crc32(data), len(data), len(data), None
+
+                writer.add(name, 0o100644, now_ns, 0, len(data), write_bytes)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = now_ns / 1e9
+                info.mode = 0o644
+                writer.addfile(info, io.BytesIO(data))
+        if fmt == "zip":
+            writer.finish()
+        else:
+            writer.close()
+        f.flush()
+        os.fsync(f.fileno())
+    except BaseException:
+        f.close()
+        checkpoint.close(remove=False)
+        raise
+    f.close()
+    checkpoint.close(remove=True)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "archive": archive_path,
+        "format": fmt,
+        "sessions": roots,
+        "files": len(listing),
+        "resumed": len(done or ()),
+        "bytes": total_bytes,
+        "archive_bytes": os.path.getsize(archive_path),
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(total_bytes / elapsed / 1e6, 1) if elapsed > 0 else 0.0,
+        "workers": workers,
+    }
+
@@ -0,0 +1,217 @@
+import getpass
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+META_DIR = ".organizer"
+HASH_INDEX_NAME = "hashes.tsv"
+MANIFEST_NAME = "manifest.jsonl"
+HASH_ALGORITHM = "sha256"
+READ_CHUNK = 1024 * 1024
+TMP_SUFFIX = ".organizer-tmp"
+
+DEDUP_MODES = ("skip", "link", "keep")
+
+
+def new_hasher():
+    return hashlib.new(HASH_ALGORITHM)
+
+
+def hash_file(path: str, chunk: int = READ_CHUNK) -> str:
+    h = new_hasher()
+    buf = bytearray(chunk)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def meta_path(session_folder: str, name: str) -> str:
+    return os.path.join(session_folder, META_DIR, name)
+
+
+class HashIndex:
+    def __init__(self, session_folder: str):
+        self.session_folder = session_folder
+        self.path = meta_path(session_folder, HASH_INDEX_NAME)
+        self._lock = threading.Lock()
+        self._by_digest = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    digest, sep, name = line.rstrip("\n").partition("\t")
+                    if sep:
+                        self._by_digest.setdefault(digest, name)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._by_digest)
+
+    def claim(self, digest: str, name: str):
+        with self._lock:
+            existing = self._by_digest.get(digest)
+            if existing and existing != name and os.path.exists(os.path.join(self.session_folder, existing)):
+                return existing
+            self._by_digest[digest] = name
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{digest}\t{name}\n")
+            return None
+
+    def discard(self, digest: str, name: str):
+        with self._lock:
+            if self._by_digest.get(digest) == name:
+                del self._by_digest[digest]
+
+
+def local_iso(ts: float = None) -> str:
+    dt = datetime.fromtimestamp(ts) if ts is not None else datetime.now()
+    return dt.astimezone().isoformat(timespec="seconds")
+
+
+def session_relpath(path: str, session_folder: str) -> str:
+    return os.path.relpath(path, session_folder).replace(os.sep, "/")
+
+
+class CustodyManifest:
+    def __init__(self, session_folder: str, on_append=None):
+        self.session_folder = session_folder
+        self.path = meta_path(session_folder, MANIFEST_NAME)
+        self.on_append = on_append
+        self._lock = threading.Lock()
+
+    def append(self, record: dict):
+        line = json.dumps(record, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(f"{line}\n".encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                offset = f.tell()
+            if self.on_append:
+                self.on_append(self.session_folder, record, offset)
+
+    def record(self, path: str, digest: str, method: str, source: str = None, linked_to: str = None, extra: dict = None):
+        st = os.stat(path)
+        record = {
+            "file": session_relpath(path, self.session_folder),
+            HASH_ALGORITHM: digest,
+            "size": st.st_size,
+            "method": method,
+            "source": source,
+            "modified_at": local_iso(st.st_mtime),
+            "recorded_at": local_iso(),
+            "host": platform.node(),
+            "user": getpass.getuser(),
+        }
+        if linked_to:
+            record["linked_to"] = linked_to
+        if extra:
+            record.update(extra)
+        self.append(record)
+        return record
+
+    def record_removal(self, name: str, replaced_by: str = None):
+        record = {"file": name, "removed": True, "recorded_at": local_iso(), "host": platform.node(), "user": getpass.getuser()}
+        if replaced_by:
+            record["replaced_by"] = replaced_by
+        self.append(record)
+
+    def entries(self) -> dict:
+        expected = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    record = json.loads(line)
+                    if record.get("removed"):
+                        expected.pop(record["file"], None)
+                    else:
+                        expected[record["file"]] = record
+        except FileNotFoundError:
+            pass
+        return expected
+
+
+def merkle_root(leaves) -> str:
+    level = [
+        hashlib.sha256(b"\x00" + name.encode("utf-8") + b"\x00" + bytes.fromhex(digest)).digest()
+        for name, digest in sorted(leaves)
+    ]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        nxt = []
+        for i in range(0, len(level) - 1, 2):
+            nxt.append(hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest())
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
+
+def session_files(session_folder: str):
+    found = []
+    stack = [session_folder]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != META_DIR:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(TMP_SUFFIX):
+                    found.append(entry.path)
+    return found
+
+
+def verify_session(session_folder: str, workers: int = None) -> dict:
+    t0 = time.perf_counter()
+    expected = CustodyManifest(session_folder).entries()
+    paths = session_files(session_folder)
+    workers = workers or os.cpu_count() or 1
+
+    actual = {}
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, digest in zip(paths, pool.map(hash_file, paths)):
+            actual[session_relpath(path, session_folder)] = digest
+            total_bytes += os.path.getsize(path)
+
+    modified = sorted(name for name, rec in expected.items() if name in actual and actual[name] != rec[HASH_ALGORITHM])
+    missing = sorted(name for name in expected if name not in actual)
+    untracked = sorted(name for name in actual if name not in expected)
+
+    elapsed = time.perf_counter() - t0
+    expected_root = merkle_root((name, rec[HASH_ALGORITHM]) for name, rec in expected.items())
+    actual_root = merkle_root(actual.items())
+    return {
+        "session": session_folder,
+        "files": len(actual),
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(total_bytes / elapsed / 1e6, 1) if elapsed > 0 else 0.0,
+        "workers": workers,
+        "manifest_root": expected_root,
+        "root": actual_root,
+        "intact": not modified and not missing and not untracked,
+        "modified": modified,
+        "missing": missing,
+        "untracked": untracked,
+    }
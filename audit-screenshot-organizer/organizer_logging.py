@@ -0,0 +1,130 @@
+import collections
+import os
+import sys
+import threading
+import queue
+
+from organizer_integrity import META_DIR
+
+SESSION_LOG_NAME = "session.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+UNSESSIONED_BUFFER = 1000
+HELD_LINES = 20000
+
+
+def report_stderr(message: str):
+    sys.stderr.write(f"{message}\n")
+    sys.stderr.flush()
+
+
+class SessionLogWriter:
+    def __init__(self, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS, report=None):
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.report = report or report_stderr
+        self._held = {}
+        self._queue = queue.SimpleQueue()
+        self._files = {}
+        self._unsessioned = collections.deque(maxlen=UNSESSIONED_BUFFER)
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="session-log")
+        self._thread.start()
+
+    def write(self, session_folder: str, line: str):
+        self._queue.put((session_folder, line))
+
+    def stop(self, timeout: float = 3):
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 5000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = None in batch
+            grouped = collections.defaultdict(list)
+            for item in batch:
+                if item is None:
+                    continue
+                session_folder, line = item
+                if not session_folder:
+                    self._unsessioned.append(line)
+                    continue
+                if self._unsessioned:
+                    grouped[session_folder].extend(self._unsessioned)
+                    self._unsessioned.clear()
+                grouped[session_folder].append(line)
+
+            if stop:
+                for session_folder in self._held:
+                    grouped.setdefault(session_folder, [])
+            for session_folder, lines in grouped.items():
+                self._flush(session_folder, lines)
+            if stop:
+                for session_folder, held in self._held.items():
+                    self.report(f"Session log: {len(held)} line(s) could not be written to {session_folder} and were lost.")
+                self._held = {}
+                for f in self._files.values():
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+                self._files = {}
+                return
+
+    def _flush(self, session_folder: str, lines):
+        held = self._held.pop(session_folder, None)
+        if held:
+            held.extend(lines)
+            lines = held
+        try:
+            self._append(session_folder, lines)
+        except OSError as e:
+            f = self._files.pop(session_folder, None)
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+            self._held[session_folder] = collections.deque(lines, maxlen=HELD_LINES)
+            if not held:
+                self.report(f"Session log could not be written ({e}); holding lines until it can.")
+            return
+        if held:
+            self.report(f"Session log writable again; wrote {len(lines)} held line(s).")
+        try:
+            if self._files[session_folder].tell() >= self.max_bytes:
+                self._rotate(session_folder)
+        except OSError as e:
+            self.report(f"Session log could not be rotated: {e}")
+
+    def _append(self, session_folder: str, lines):
+        f = self._files.get(session_folder)
+        if f is None:
+            folder = os.path.join(session_folder, META_DIR)
+            os.makedirs(folder, exist_ok=True)
+            f = self._files[session_folder] = open(os.path.join(folder, SESSION_LOG_NAME), "a", encoding="utf-8")
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+
+    def _rotate(self, session_folder: str):
+        f = self._files.pop(session_folder)
+        path = f.name
+        f.close()
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{path}.{n + 1}")
+        os.replace(path, f"{path}.1")
@@ -0,0 +1,307 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from organizer_integrity import META_DIR, TMP_SUFFIX
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 12, 20)
+METRICS_SNAPSHOT_NAME = "metrics.json"
+
+
+def label_key(labels: dict):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def format_labels(key, extra=None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def cells(self) -> dict:
+        cells = getattr(self._local, "cells", None)
+        if cells is None:
+            cells = self._local.cells = {}
+            with self._lock:
+                self._shards.append(cells)
+        return cells
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str):
+        return self.register(Counter(self, name, help))
+
+    def histogram(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(self, name, help, buckets))
+
+    def gauge(self, name: str, help: str):
+        return self.register(Gauge(name, help))
+
+    def merged(self, metric) -> dict:
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for cells in shards:
+            for (name, key), cell in list(cells.items()):
+                if name != metric.name:
+                    continue
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(cell)
+                else:
+                    for i, v in enumerate(cell):
+                        total[i] += v
+        return totals
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        lines.append("# HELP organizer_uptime_seconds Seconds since the process started collecting metrics.")
+        lines.append("# TYPE organizer_uptime_seconds gauge")
+        lines.append(f"organizer_uptime_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics)
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "metrics": {metric.name: metric.snapshot() for metric in metrics},
+        }
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str):
+        self.registry = registry
+        self.name = name
+        self.help = help
+
+    def inc(self, amount: float = 1, **labels):
+        cells = self.registry.cells()
+        key = (self.name, label_key(labels))
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = [0]
+        cell[0] += amount
+
+    def values(self) -> dict:
+        return {key: cell[0] for key, cell in self.registry.merged(self).items()}
+
+    def prometheus_lines(self):
+        return [f"{self.name}{format_labels(key)} {value}" for key, value in sorted(self.values().items())]
+
+    def snapshot(self):
+        return [{"labels": dict(key), "value": value} for key, value in sorted(self.values().items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        cells = self.registry.cells()
+        key = (self.name, label_key(labels))
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = [0] * (len(self.buckets) + 3)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def prometheus_lines(self):
+        lines = []
+        for key, cell in sorted(self.registry.merged(self).items()):
+            running = 0
+            for bound, n in zip(self.buckets, cell):
+                running += n
+                lines.append(f"{self.name}_bucket{format_labels(key, ('le', f'{bound:g}'))} {running}")
+            lines.append(f"{self.name}_bucket{format_labels(key, ('le', '+Inf'))} {cell[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {cell[-2]:.6f}")
+            lines.append(f"{self.name}_count{format_labels(key)} {cell[-1]}")
+        return lines
+
+    def snapshot(self):
+        found = []
+        for key, cell in sorted(self.registry.merged(self).items()):
+            count = cell[-1]
+            found.append({
+                "labels": dict(key),
+                "count": count,
+                "sum": round(cell[-2], 6),
+                "mean": round(cell[-2] / count, 6) if count else None,
+                "p50": self.quantile(cell, 0.5),
+                "p95": self.quantile(cell, 0.95),
+                "p99": self.quantile(cell, 0.99),
+                "buckets": {f"{bound:g}": n for bound, n in zip(self.buckets, cell)},
+            })
+        return found
+
+    def quantile(self, cell, q: float):
+        count = cell[-1]
+        if not count:
+            return None
+        target = q * count
+        running = 0
+        for bound, n in zip(self.buckets, cell):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.read = None
+
+    def set_function(self, read):
+        self.read = read
+
+    def value(self):
+        try:
+            return float(self.read()) if self.read else 0.0
+        except Exception:
+            return 0.0
+
+    def prometheus_lines(self):
+        return [f"{self.name} {self.value():g}"]
+
+    def snapshot(self):
+        return self.value()
+
+
+METRICS = MetricsRegistry()
+
+WATCH_EVENTS = METRICS.counter("organizer_watch_events_total", "Filesystem events received for wanted files, by event type.")
+STABILIZE_SECONDS = METRICS.histogram("organizer_stabilize_seconds", "Time from the first filesystem event to the file being judged complete.")
+QUEUE_WAIT_SECONDS = METRICS.histogram("organizer_queue_wait_seconds", "Time a claimed move waited for a mover thread.")
+MOVE_SECONDS = METRICS.histogram("organizer_move_seconds", "Duration of a successful move into the session folder, by kind (rename or copy).")
+MOVE_ATTEMPTS = METRICS.histogram("organizer_move_attempts", "Attempts needed per filed file.", buckets=COUNT_BUCKETS)
+MOVE_RETRIES = METRICS.counter("organizer_move_retries_total", "Moves retried because the source file was locked or a cross-volume copy failed, by reason.")
+MOVE_FAILURES = METRICS.counter("organizer_move_failures_total", "Files that could not be moved, by reason.")
+LANDED_SECONDS = METRICS.histogram("organizer_file_landed_seconds", "Hashing, duplicate check and manifest write per stored file.")
+FILES_STORED = METRICS.counter("organizer_files_total", "Files stored in sessions, by capture method.")
+DUPLICATES = METRICS.counter("organizer_duplicates_total", "Byte-identical duplicates, by action taken.")
+GRAB_SECONDS = METRICS.histogram("organizer_capture_grab_seconds", "Screen grab duration, by capture method.")
+ENCODE_SECONDS = METRICS.histogram("organizer_capture_encode_seconds", "PNG encode and write duration, by capture method.")
+NAVIGATE_SECONDS = METRICS.histogram("organizer_playwright_navigate_seconds", "Playwright page navigation time.")
+PAGE_CAPTURE_SECONDS = METRICS.histogram("organizer_playwright_capture_seconds", "Playwright screenshot time per page after navigation.")
+READY_SECONDS = METRICS.histogram("organizer_playwright_ready_seconds", "Time spent in each page readiness step (navigation load state, capped network idle, selector, settle).")
+BLOCKED_REQUESTS = METRICS.counter("organizer_playwright_blocked_requests_total", "Requests aborted by the Playwright request blocker, by resource type.")
+PAGE_FAILURES = METRICS.counter("organizer_playwright_failures_total", "Playwright page jobs that failed after retries.")
+QUEUE_DEPTH = METRICS.gauge("organizer_move_queue_depth", "Files waiting to be moved, including locked files waiting to retry.")
+PENDING_WRITES = METRICS.gauge("organizer_pending_writes", "Files seen in the source folder that are still being written.")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = self.registry.prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(self.registry.snapshot(), indent=2).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="metrics-http")
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class SnapshotWriter:
+    def __init__(self, folder, interval: float):
+        self.folder = folder
+        self.interval = max(1.0, float(interval))
+        self.stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="metrics-snapshot")
+        self._thread.start()
+
+    def stop(self, timeout: float = 3):
+        self.stopped.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self.write()
+
+    def write(self):
+        folder = self.folder()
+        if not folder:
+            return
+        path = os.path.join(folder, META_DIR, METRICS_SNAPSHOT_NAME)
+        tmp_path = f"{path}{TMP_SUFFIX}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(METRICS.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
@@ -0,0 +1,180 @@
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from organizer_integrity import TMP_SUFFIX, hash_file, session_relpath
+
+OPTIMIZE_FORMATS = ("off", "png", "webp")
+DEFAULT_OPTIMIZE_WORKERS = 1
+LOSSLESS_MODES = ("1", "L", "LA", "P", "RGB", "RGBA")
+WEBP_MAX_DIMENSION = 16383
+
+
+def human_size(n: int) -> str:
+    if n >= 1e6:
+        return f"{n / 1e6:.1f} MB"
+    return f"{n / 1e3:.0f} KB"
+
+
+def lower_priority():
+    try:
+        if platform.system() == "Windows":
+            import ctypes
+
+            below_normal = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), below_normal)
+        else:
+            os.nice(10)
+    except Exception:
+        pass
+
+
+def optimize_image(path: str, fmt: str, effort: int):
+    from PIL import Image, PngImagePlugin
+
+    t0 = time.perf_counter()
+    before = os.path.getsize(path)
+    with Image.open(path) as img:
+        img.load()
+        if img.mode not in LOSSLESS_MODES:
+            return None
+        if fmt == "webp" and max(img.size) > WEBP_MAX_DIMENSION:
+            fmt = "png"
+        if fmt == "webp":
+            out_path = f"{os.path.splitext(path)[0]}.webp"
+            tmp_path = f"{out_path}{TMP_SUFFIX}"
+            img.save(tmp_path, "WEBP", lossless=True, quality=100, method=effort, exif=img.info.get("exif", b""))
+        else:
+            out_path = path
+            tmp_path = f"{path}{TMP_SUFFIX}"
+            pnginfo = PngImagePlugin.PngInfo()
+            for key, value in getattr(img, "text", {}).items():
+                pnginfo.add_text(key, value)
+            params = {"optimize": True, "pnginfo": pnginfo}
+            for key in ("dpi", "icc_profile"):
+                if key in img.info:
+                    params[key] = img.info[key]
+            img.save(tmp_path, "PNG", **params)
+
+        try:
+            after = os.path.getsize(tmp_path)
+            identical = after < before
+            if identical:
+                with Image.open(tmp_path) as check:
+                    check.load()
+                    identical = check.size == img.size and check.convert("RGBA").tobytes() == img.convert("RGBA").tobytes()
+            if not identical:
+                os.remove(tmp_path)
+                return None
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return {
+        "tmp_path": tmp_path,
+        "out_path": out_path,
+        "before": before,
+        "after": after,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+class ImageOptimizer:
+    def __init__(self, engine, fmt: str = "png", workers: int = DEFAULT_OPTIMIZE_WORKERS, effort: int = None):
+        self.engine = engine
+        self.fmt = fmt
+        self.workers = max(1, int(workers))
+        self.effort = 4 if effort is None else effort
+        self._pool = None
+        self._lock = threading.Lock()
+        self.files = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.seconds = 0.0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=lower_priority)
+            return self._pool
+
+    def submit(self, path: str, session_folder: str, digest: str):
+        fut = self._executor().submit(optimize_image, path, self.fmt, self.effort)
+        fut.add_done_callback(lambda f: self._finish(f, path, session_folder, digest))
+        return fut
+
+    def _finish(self, fut, path: str, session_folder: str, digest: str):
+        if fut.cancelled():
+            return
+        name = session_relpath(path, session_folder)
+        try:
+            result = fut.result()
+        except Exception as e:
+            self.engine.log(f"Optimize failed for {name}: {e}")
+            return
+        if result is None:
+            return
+
+        out_path = result["out_path"]
+        try:
+            if out_path != path:
+                out_path = self.engine.claim_path(os.path.dirname(path), os.path.basename(out_path))
+            os.replace(result["tmp_path"], out_path)
+            if out_path != path:
+                os.remove(path)
+        except OSError as e:
+            try:
+                os.remove(result["tmp_path"])
+            except OSError:
+                pass
+            self.engine.log(f"Optimize could not replace {name}: {e}")
+            return
+
+        new_name = session_relpath(out_path, session_folder)
+        new_digest = hash_file(out_path)
+        self.engine.hash_index(session_folder).claim(new_digest, new_name)
+        manifest = self.engine.manifest(session_folder)
+        manifest.record(
+            out_path,
+            new_digest,
+            "optimized",
+            extra={"optimized_from": {"file": name, "sha256": digest, "size": result["before"]}},
+        )
+        if out_path != path:
+            manifest.record_removal(name, replaced_by=new_name)
+            self.engine.name_index(os.path.dirname(path)).release(path)
+
+        with self._lock:
+            self.files += 1
+            self.bytes_before += result["before"]
+            self.bytes_after += result["after"]
+            self.seconds += result["seconds"]
+        saved = 100 * (1 - result["after"] / result["before"]) if result["before"] else 0
+        self.engine.log(
+            f"Optimized {new_name}: {human_size(result['before'])} → {human_size(result['after'])} "
+            f"(-{saved:.0f}%) in {result['seconds']:.1f}s"
+        )
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.files:
+                return ""
+            rate = self.bytes_before / self.seconds / 1e6 if self.seconds else 0.0
+            return (
+                f"Optimized {self.files} file(s): {human_size(self.bytes_before)} → {human_size(self.bytes_after)}, "
+                f"{rate:.1f} MB/s per worker"
+            )
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        summary = self.summary()
+        if summary:
+            self.engine.log(summary)
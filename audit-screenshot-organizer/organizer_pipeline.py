@@ -0,0 +1,419 @@
+import asyncio
+import os
+import threading
+import time
+
+from organizer_core import CoreClosed
+from organizer_metrics import MOVE_ATTEMPTS, MOVE_FAILURES, MOVE_RETRIES, MOVE_SECONDS, QUEUE_WAIT_SECONDS, STABILIZE_SECONDS
+from organizer_transfer import TransferError, move_file
+
+MOVE_LANE = "move"
+PREPARE_LANE = "move-prepare"
+DEFAULT_MOVE_WORKERS = 2
+MAX_MOVE_ATTEMPTS = 12
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+STABLE_QUIET = 0.5
+CLOSED_QUIET = 0.05
+STABILITY_TICK = 0.1
+CATCHUP_BATCH = 200
+CATCHUP_SETTLE = 5.0
+
+
+def file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class PendingFile:
+    __slots__ = ("first_event", "last_event", "signature", "closed", "in_flight", "dirty")
+
+    def __init__(self, now: float):
+        self.first_event = now
+        self.last_event = now
+        self.signature = None
+        self.closed = False
+        self.in_flight = False
+        self.dirty = False
+
+
+class WriteStabilizer:
+    def __init__(self, release, quiet: float = STABLE_QUIET, closed_quiet: float = CLOSED_QUIET, tick: float = STABILITY_TICK):
+        self.release = release
+        self.quiet = quiet
+        self.closed_quiet = closed_quiet
+        self.tick = tick
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="write-stabilizer")
+        self._thread.start()
+
+    def stop(self, timeout: float = 3):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def note(self, path: str, closed: bool = False):
+        now = time.monotonic()
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is None:
+                entry = self._pending[path] = PendingFile(now)
+            elif entry.in_flight:
+                entry.dirty = True
+                entry.closed = closed
+                return
+            entry.last_event = now
+            entry.closed = closed
+            self._cond.notify()
+
+    def admit(self, path: str) -> bool:
+        with self._cond:
+            if path in self._pending:
+                return False
+            entry = self._pending[path] = PendingFile(time.monotonic())
+            entry.in_flight = True
+        self.release(path)
+        return True
+
+    def forget(self, path: str):
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is not None and not entry.in_flight:
+                del self._pending[path]
+
+    def finished(self, path: str):
+        with self._cond:
+            entry = self._pending.pop(path, None)
+            if entry is None or not entry.dirty:
+                return
+            if os.path.exists(path):
+                retrack = self._pending[path] = PendingFile(time.monotonic())
+                retrack.closed = entry.closed
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not any(not e.in_flight for e in self._pending.values()):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                candidates = [(p, e) for p, e in self._pending.items() if not e.in_flight]
+            ready = []
+            now = time.monotonic()
+            for path, entry in candidates:
+                quiet = self.closed_quiet if entry.closed else self.quiet
+                if now - entry.last_event < quiet:
+                    continue
+                sig = file_signature(path)
+                if sig is None:
+                    self.forget(path)
+                    continue
+                if sig[0] > 0 and (entry.closed or sig == entry.signature):
+                    ready.append((path, entry))
+                else:
+                    entry.signature = sig
+            with self._cond:
+                for path, entry in ready:
+                    if self._pending.get(path) is entry and not entry.in_flight:
+                        entry.in_flight = True
+                        entry.dirty = False
+                        entry.closed = False
+                        STABILIZE_SECONDS.observe(now - entry.first_event)
+                        self.release(path)
+                if not self._stopping:
+                    self._cond.wait(self.tick)
+
+
+class MoveJob:
+    __slots__ = ("src_path", "dest_path", "index", "session_folder", "attempts", "queued_at")
+
+    def __init__(self, src_path: str, dest_path: str, index, session_folder: str = None):
+        self.src_path = src_path
+        self.dest_path = dest_path
+        self.index = index
+        self.session_folder = session_folder or index.folder
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+
+class MovePipeline:
+    def __init__(self, engine, workers: int = DEFAULT_MOVE_WORKERS, max_attempts: int = MAX_MOVE_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY):
+        self.engine = engine
+        self.core = engine.core
+        self.workers = max(1, int(workers))
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = set()
+        self._delayed = {}
+        self._accepting = False
+
+    def start(self):
+        if self._accepting:
+            return
+        self.core.start()
+        self.core.lane(MOVE_LANE, self.workers)
+        self.core.lane(PREPARE_LANE, 1)
+        self._accepting = True
+
+    def submit(self, src_path: str) -> bool:
+        if not self._accepting:
+            return False
+        with self._lock:
+            self._queued += 1
+        try:
+            self.core.call_soon(self._dispatch, src_path)
+        except CoreClosed:
+            with self._lock:
+                self._queued -= 1
+            return False
+        return True
+
+    def stop(self, timeout: float = 3):
+        if not self._accepting:
+            return
+        self._accepting = False
+        if not self.core.running():
+            return
+        parked = asyncio.run_coroutine_threadsafe(self._unpark_all(), self.core.loop).result(timeout)
+        deadline = time.monotonic() + timeout
+        while self.pending() - len(self._active) > 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        cancelled = self.core.wait_for(lambda: set(self._active), max(0.0, deadline - time.monotonic()))
+        if parked:
+            self.engine.log(f"Left {parked} locked file(s) in the source folder.")
+        if cancelled > 0:
+            self.engine.log(f"Stopped before moving {cancelled} file(s); they are still in the source folder.")
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._queued + len(self._delayed)
+
+    async def _unpark_all(self) -> int:
+        delayed = list(self._delayed.items())
+        self._delayed = {}
+        for job, handle in delayed:
+            handle.cancel()
+            job.index.release(job.dest_path)
+            self.engine.move_finished(job.src_path)
+        return len(delayed)
+
+    def _dispatch(self, src_path: str):
+        self._track(self.core.spawn(self._admit(src_path)))
+
+    def _track(self, task):
+        self._active.add(task)
+        task.add_done_callback(self._active.discard)
+
+    async def _admit(self, src_path: str):
+        try:
+            job = await self.core.in_lane(PREPARE_LANE, self._prepare, src_path)
+        except asyncio.CancelledError:
+            self.engine.move_finished(src_path)
+            raise
+        finally:
+            with self._lock:
+                self._queued -= 1
+        if job is not None:
+            self._run(job)
+
+    def _prepare(self, src_path: str):
+        try:
+            if not src_path or not os.path.exists(src_path):
+                self.engine.move_finished(src_path)
+                return None
+            session_folder = self.engine.active_session_folder
+            if not session_folder:
+                self.engine.log("No active session. Start a session first.")
+                self.engine.move_finished(src_path)
+                return None
+            filename = os.path.basename(src_path)
+            folder = self.engine.route_folder(session_folder, filename, "moved", source=os.path.dirname(src_path))
+            index = self.engine.name_index(folder)
+            return MoveJob(src_path, index.claim(filename), index, session_folder)
+        except Exception as e:
+            self.engine.log(f"Error moving file: {e}")
+            self.engine.move_finished(src_path)
+            return None
+
+    def _run(self, job: MoveJob):
+        with self._lock:
+            self._delayed.pop(job, None)
+            self._queued += 1
+        self._track(self.core.spawn(self._work(job)))
+
+    async def _work(self, job: MoveJob):
+        done = True
+        try:
+            done = await self.core.run_limited(MOVE_LANE, self._attempt_safely, job)
+        except asyncio.CancelledError:
+            job.index.release(job.dest_path)
+            raise
+        finally:
+            with self._lock:
+                self._queued -= 1
+            if done:
+                self.engine.move_finished(job.src_path)
+        if not done:
+            self._park(job)
+
+    def _park(self, job: MoveJob):
+        if not self._accepting:
+            job.index.release(job.dest_path)
+            self.engine.move_finished(job.src_path)
+            self.engine.log(f"Left locked file in the source folder: {os.path.basename(job.src_path)}")
+            return
+        delay = min(self.max_delay, self.base_delay * (2 ** (job.attempts - 1)))
+        handle = self.core.loop.call_later(delay, self._run, job)
+        with self._lock:
+            self._delayed[job] = handle
+
+    def _attempt_safely(self, job: MoveJob) -> bool:
+        try:
+            return self._attempt(job)
+        except Exception as e:
+            job.index.release(job.dest_path)
+            MOVE_FAILURES.inc(reason="error")
+            self.engine.log(f"Error moving file: {e}")
+            return True
+
+    def _attempt(self, job: MoveJob) -> bool:
+        if not os.path.exists(job.src_path):
+            job.index.release(job.dest_path)
+            return True
+        if not job.attempts:
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - job.queued_at)
+        job.attempts += 1
+        if os.path.exists(job.dest_path):
+            taken = job.dest_path
+            job.dest_path = job.index.claim(os.path.basename(job.src_path))
+            job.index.release(taken)
+        t0 = time.perf_counter()
+        try:
+            kind, digest = move_file(job.src_path, job.dest_path, durable=self.engine.move_fsync, verify=self.engine.move_verify)
+        except (PermissionError, TransferError) as e:
+            reason = "locked" if isinstance(e, PermissionError) else "copy"
+            if job.attempts >= self.max_attempts:
+                job.index.release(job.dest_path)
+                MOVE_FAILURES.inc(reason=reason)
+                if reason == "locked":
+                    self.engine.log(f"Skipped (file still locked): {os.path.basename(job.src_path)}")
+                else:
+                    self.engine.log(f"Skipped (copy failed {job.attempts} times: {e.strerror}): {os.path.basename(job.src_path)}")
+                return True
+            MOVE_RETRIES.inc(reason=reason)
+            return False
+        MOVE_SECONDS.observe(time.perf_counter() - t0, kind=kind.split("-")[0])
+        MOVE_ATTEMPTS.observe(job.attempts)
+        if kind == "copy-kept-source":
+            self.engine.log(f"Copied {os.path.basename(job.src_path)}, but the source could not be removed.")
+        if self.engine.file_landed(job.dest_path, "moved", session_folder=job.session_folder, source=job.src_path, digest=digest):
+            self.engine.log(f"Moved: {os.path.basename(job.dest_path)} → {os.path.dirname(job.dest_path)}")
+        return True
+
+
+def scan_backlog(folders, wanted, max_age_seconds: float = None, recursive: bool = False, excluded=None):
+    cutoff = time.time() - max_age_seconds if max_age_seconds else None
+    found = []
+    stack = [folders] if isinstance(folders, str) else list(folders)
+    top = set(stack)
+    while stack:
+        folder = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError:
+            if folder in top:
+                raise
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        if not (excluded and excluded(entry.path)):
+                            stack.append(entry.path)
+                        continue
+                    if not wanted(entry.name) or not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if cutoff is not None and mtime < cutoff:
+                    continue
+                found.append((mtime, entry.path))
+    found.sort()
+    return found
+
+
+class BacklogScanner:
+    def __init__(self, engine, folders, max_age_seconds: float = None, batch: int = CATCHUP_BATCH, recursive: bool = False):
+        self.engine = engine
+        self.folders = [folders] if isinstance(folders, str) else list(folders)
+        self.recursive = recursive
+        self.max_age_seconds = max_age_seconds
+        self.batch = max(1, int(batch))
+        self.cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="backlog-scan")
+        self._thread.start()
+
+    def cancel(self, timeout: float = 3):
+        self.cancelled.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        t0 = time.monotonic()
+        try:
+            found = scan_backlog(self.folders, self.engine.wants_file, self.max_age_seconds,
+                                 recursive=self.recursive, excluded=self.engine.watch_excluded)
+        except OSError as e:
+            self.engine.log(f"Catch-up scan failed: {e}")
+            return
+        if not found:
+            self.engine.log("Catch-up: no existing screenshots to file.")
+            return
+        self.engine.log(f"Catch-up: found {len(found)} existing screenshot(s), filing in batches of {self.batch}.")
+
+        stabilizer = self.engine.stabilizer
+        queued = 0
+        for start in range(0, len(found), self.batch):
+            while self.engine.pending_moves() >= self.batch:
+                if self.cancelled.wait(0.05):
+                    break
+            if self.cancelled.is_set():
+                break
+            now = time.time()
+            for mtime, path in found[start:start + self.batch]:
+                if now - mtime < CATCHUP_SETTLE:
+                    stabilizer.note(path)
+                elif stabilizer.admit(path):
+                    queued += 1
+        if self.cancelled.is_set():
+            self.engine.log(f"Catch-up stopped after queueing {queued} file(s).")
+        else:
+            self.engine.log(f"Catch-up: queued {queued} file(s) in {time.monotonic() - t0:.1f}s.")
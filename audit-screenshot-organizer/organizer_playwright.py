@@ -0,0 +1,433 @@
+import asyncio
+import fnmatch
+import re
+import time
+
+from organizer_metrics import BLOCKED_REQUESTS, PAGE_FAILURES, READY_SECONDS
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_WAIT = "networkidle"
+DEFAULT_IDLE_CAP = 5.0
+DEFAULT_NAV_TIMEOUT = 60.0
+ELEMENT_TIMEOUT = 15.0
+LOAD_STATES = ("commit", "domcontentloaded", "load")
+WAIT_STEPS = LOAD_STATES + ("networkidle", "selector", "settle")
+WAIT_SPLIT = re.compile(r"\+(?=\s*(?:%s)\b)" % "|".join(WAIT_STEPS), re.IGNORECASE)
+RESOURCE_TYPES = (
+    "document", "stylesheet", "image", "media", "font", "script", "texttrack",
+    "xhr", "fetch", "eventsource", "websocket", "manifest", "other",
+)
+VIEWPORT_PRESETS = {"desktop": (1366, 768), "laptop": (1280, 800), "tablet": (820, 1180), "mobile": (390, 844)}
+LIST_OPTIONS = ("wait", "viewport", "matches")
+TRACKER_PATTERNS = (
+    "*://*.google-analytics.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.doubleclick.net/*",
+    "*://*.googlesyndication.com/*",
+    "*://connect.facebook.net/*",
+    "*://*.hotjar.com/*",
+    "*://*.segment.com/*",
+    "*://*.segment.io/*",
+    "*://*.mixpanel.com/*",
+    "*://*.amplitude.com/*",
+    "*://*.nr-data.net/*",
+    "*://*.newrelic.com/*",
+    "*://*.clarity.ms/*",
+    "*://*.fullstory.com/*",
+    "*://*.intercom.io/*",
+    "*://*.sentry.io/*",
+)
+
+
+def ms(seconds: float) -> int:
+    return int(round(seconds * 1000))
+
+
+def normalize_url(url: str) -> str:
+    url = url.strip()
+    if url and not re.match(r"^https?://", url, flags=re.IGNORECASE):
+        url = f"https://{url}"
+    return url
+
+
+def parse_selectors(value) -> list:
+    parts = value.split(";") if isinstance(value, str) else list(value or ())
+    found = []
+    for part in parts:
+        part = part.strip()
+        if part and part not in found:
+            found.append(part)
+    return found
+
+
+def parse_viewports(value) -> list:
+    parts = re.split(r"[\s,;]+", value) if isinstance(value, str) else list(value or ())
+    found = []
+    for part in parts:
+        if isinstance(part, tuple):
+            size = part
+        else:
+            part = part.strip().lower()
+            if not part:
+                continue
+            size = VIEWPORT_PRESETS.get(part)
+            if size is None:
+                m = re.fullmatch(r"(\d+)x(\d+)", part)
+                if not m:
+                    raise ValueError(f"bad viewport {part!r} (use WIDTHxHEIGHT or {', '.join(VIEWPORT_PRESETS)})")
+                size = (int(m.group(1)), int(m.group(2)))
+        if min(size) < 1:
+            raise ValueError(f"bad viewport {size[0]}x{size[1]}")
+        if size not in found:
+            found.append(size)
+    return found
+
+
+def viewport_name(size) -> str:
+    return f"{size[0]}x{size[1]}"
+
+
+async def settle_layout(page):
+    await page.evaluate("() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)))")
+
+
+def parse_wait(value: str):
+    steps = []
+    for part in WAIT_SPLIT.split(value or DEFAULT_WAIT):
+        kind, _, arg = part.strip().partition(":")
+        kind = kind.strip().lower()
+        arg = arg.strip()
+        if kind not in WAIT_STEPS:
+            raise ValueError(f"unknown wait step {kind!r} (use {', '.join(WAIT_STEPS)})")
+        if kind == "selector":
+            if not arg:
+                raise ValueError("selector wait needs a CSS selector, e.g. selector:#main")
+            steps.append((kind, arg))
+        elif kind in ("networkidle", "settle"):
+            try:
+                seconds = float(arg) if arg else None
+            except ValueError:
+                raise ValueError(f"{kind} takes a number of seconds, got {arg!r}")
+            if kind == "settle" and seconds is None:
+                raise ValueError("settle wait needs a delay, e.g. settle:1.5")
+            steps.append((kind, seconds))
+        else:
+            if arg:
+                raise ValueError(f"{kind} does not take an argument")
+            steps.append((kind, None))
+    return tuple(steps)
+
+
+def describe_wait(steps) -> str:
+    return "+".join(kind if arg is None else f"{kind}:{arg:g}" if isinstance(arg, float) else f"{kind}:{arg}" for kind, arg in steps)
+
+
+async def wait_ready(page, url: str, steps, timeout: float = DEFAULT_NAV_TIMEOUT, idle_cap: float = DEFAULT_IDLE_CAP):
+    from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+    if steps and steps[0][0] in LOAD_STATES:
+        first, rest = steps[0][0], steps[1:]
+    else:
+        first, rest = "load" if steps and steps[0][0] == "networkidle" else "domcontentloaded", steps
+    timings = []
+    t0 = time.perf_counter()
+    await page.goto(url, wait_until=first, timeout=timeout * 1000)
+    t = time.perf_counter()
+    timings.append((first, t - t0))
+    for kind, arg in rest:
+        t0 = t
+        label = kind
+        if kind in LOAD_STATES:
+            await page.wait_for_load_state(kind, timeout=timeout * 1000)
+        elif kind == "networkidle":
+            cap = idle_cap if arg is None else arg
+            try:
+                await page.wait_for_load_state("networkidle", timeout=max(0.001, cap) * 1000)
+            except PlaywrightTimeout:
+                label = "networkidle (capped)"
+        elif kind == "selector":
+            await page.locator(arg).first.wait_for(state="visible", timeout=timeout * 1000)
+        elif kind == "settle":
+            await asyncio.sleep(arg)
+        t = time.perf_counter()
+        timings.append((label, t - t0))
+    for label, seconds in timings:
+        READY_SECONDS.observe(seconds, step=label.split(" ")[0])
+    return timings
+
+
+class RequestBlocker:
+    def __init__(self, entries=()):
+        self.types = set()
+        patterns = []
+        for entry in entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+            if entry.lower() == "trackers":
+                patterns.extend(TRACKER_PATTERNS)
+            elif entry.lower() in RESOURCE_TYPES:
+                self.types.add(entry.lower())
+            else:
+                patterns.append(entry if any(c in entry for c in "*?[") else f"*{entry}*")
+        self.patterns = tuple(dict.fromkeys(patterns))
+        self._regex = re.compile("|".join(fnmatch.translate(p) for p in self.patterns), re.IGNORECASE) if self.patterns else None
+        self.blocked = 0
+
+    def __bool__(self):
+        return bool(self.types or self._regex)
+
+    def describe(self) -> str:
+        parts = sorted(self.types)
+        if self.patterns:
+            parts.append(f"{len(self.patterns)} URL pattern(s)")
+        return ", ".join(parts) or "nothing"
+
+    def blocks(self, url: str, resource_type: str) -> bool:
+        return resource_type in self.types or (self._regex is not None and self._regex.match(url) is not None)
+
+    async def attach(self, page):
+        counts = {}
+
+        async def handle(route):
+            request = route.request
+            try:
+                main_document = request.is_navigation_request() and request.frame.parent_frame is None
+            except Exception:
+                main_document = False
+            if not main_document and self.blocks(request.url, request.resource_type):
+                counts[request.resource_type] = counts.get(request.resource_type, 0) + 1
+                BLOCKED_REQUESTS.inc(type=request.resource_type)
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+
+        await page.route("**/*", handle)
+        return counts
+
+
+class CaptureSpec:
+    __slots__ = ("url", "selectors", "wait", "viewports", "all_matches")
+
+    def __init__(self, url: str, selectors=(), wait=None, viewports=None, all_matches=None):
+        self.url = url
+        self.selectors = parse_selectors(selectors)
+        self.wait = wait
+        self.viewports = viewports
+        self.all_matches = all_matches
+
+
+def parse_list_line(line: str) -> CaptureSpec:
+    options = {}
+    while True:
+        head, _, last = line.rpartition(" ")
+        key, eq, value = last.partition("=")
+        if not head or not eq or key.lower() not in LIST_OPTIONS:
+            break
+        options.setdefault(key.lower(), value)
+        line = head.strip()
+    url, _, selectors = line.partition(" ")
+    spec = CaptureSpec(normalize_url(url), selectors)
+    if "wait" in options:
+        spec.wait = parse_wait(options["wait"])
+    if "viewport" in options:
+        spec.viewports = parse_viewports(options["viewport"])
+    if "matches" in options:
+        if options["matches"].lower() not in ("all", "first"):
+            raise ValueError("matches must be all or first")
+        spec.all_matches = options["matches"].lower() == "all"
+    return spec
+
+
+def read_url_list(path: str):
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                items.append(parse_list_line(line))
+            except ValueError as e:
+                raise ValueError(f"line {n}: {e}")
+    return items
+
+
+class Limiter:
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self._changed = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._changed:
+            self.active -= 1
+            self._changed.notify()
+
+    async def set_limit(self, limit: int):
+        async with self._changed:
+            self.limit = max(1, int(limit))
+            self._changed.notify_all()
+
+
+class BrowserPool:
+    def __init__(self, core, log=None, size: int = DEFAULT_POOL_SIZE, headless: bool = True):
+        self.core = core
+        self.log = log or (lambda _msg: None)
+        self.size = max(1, int(size))
+        self.headless = headless
+        self._pw = None
+        self._browser = None
+        self._launching = None
+        self._slots = Limiter(self.size)
+        self._jobs = set()
+        self._closed = False
+
+    @property
+    def _loop(self):
+        return self.core.loop
+
+    def submit(self, job, timeout: float = None, retries: int = 0):
+        if self._closed:
+            raise RuntimeError("Browser pool is shut down.")
+        return self.core.submit(self._run_job, job, timeout, retries)
+
+    def run(self, job, timeout: float = None, retries: int = 0):
+        return self.submit(job, timeout, retries).result()
+
+    def resize(self, size: int):
+        size = max(1, int(size))
+        if size == self.size:
+            return
+        self.size = size
+        self.core.submit(self._slots.set_limit, size)
+
+    def warm_up(self):
+        return self.core.submit(self._ensure_browser)
+
+    async def _ensure_browser(self):
+        if self._browser and self._browser.is_connected():
+            return False
+        if self._launching:
+            await self._launching
+            return False
+        self._launching = self._loop.create_future()
+        try:
+            await self._launch()
+            self._launching.set_result(True)
+        except BaseException as e:
+            self._launching.set_exception(e)
+            self._launching.exception()
+            raise
+        finally:
+            self._launching = None
+        return True
+
+    async def _launch(self):
+        from playwright.async_api import async_playwright
+
+        restarting = self._browser is not None
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        try:
+            self._browser = await self._pw.chromium.launch(headless=self.headless)
+        except Exception:
+            await self._stop_driver()
+            self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=self.headless)
+        self._browser.on("disconnected", self._on_disconnected)
+        if restarting:
+            self.log("Playwright: browser restarted.")
+
+    def _on_disconnected(self, browser):
+        if browser is self._browser and not self._closed:
+            self.log("Playwright: browser disconnected; it will be relaunched on the next capture.")
+
+    async def _acquire(self):
+        cold = await self._ensure_browser()
+        context = await self._browser.new_context()
+        try:
+            page = await context.new_page()
+        except BaseException:
+            await self._release_context(context)
+            raise
+        return page, cold
+
+    async def _release_context(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _run_job(self, job, timeout: float = None, retries: int = 0):
+        task = asyncio.current_task()
+        self._jobs.add(task)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return await self._run_once(job, timeout)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt >= retries or self._closed:
+                        PAGE_FAILURES.inc()
+                        raise
+                    attempt += 1
+                    if isinstance(e, asyncio.TimeoutError):
+                        e = f"timed out after {timeout:g}s"
+                    self.log(f"Playwright: retry {attempt}/{retries} after error: {e}")
+        finally:
+            self._jobs.discard(task)
+
+    async def _run_once(self, job, timeout: float = None):
+        async with self._slots:
+            t0 = time.perf_counter()
+            page, cold = await self._acquire()
+            acquired = time.perf_counter() - t0
+            try:
+                if timeout:
+                    return await asyncio.wait_for(job(page), timeout)
+                return await job(page)
+            finally:
+                await self._release_context(page.context)
+                self.log(
+                    f"Playwright timings: page {ms(acquired)} ms ({'cold start' if cold else 'warm browser, new context'}), "
+                    f"total {ms(time.perf_counter() - t0)} ms"
+                )
+
+    async def _stop_driver(self):
+        if self._pw is not None:
+            try:
+                await self._pw.stop()
+            except Exception:
+                pass
+            self._pw = None
+
+    async def _close(self):
+        self._closed = True
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        await self._stop_driver()
+
+    def shutdown(self, timeout: float = 5):
+        self._closed = True
+        if not self.core.running():
+            return
+        cancelled = self.core.wait_for(lambda: set(self._jobs), timeout)
+        if cancelled > 0:
+            self.log(f"Playwright: cancelled {cancelled} unfinished capture(s).")
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(timeout)
+        except Exception:
+            pass
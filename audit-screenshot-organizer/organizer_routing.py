@@ -0,0 +1,260 @@
+import json
+import os
+import re
+import string
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+ROUTE_FIELDS = ("name", "host", "method", "source", "url")
+RULE_KEYS = set(ROUTE_FIELDS) | {"to"}
+TEMPLATE_FIELDS = {"name", "stem", "ext", "method", "host", "source", "date", "year", "month", "day", "project", "audit_type"}
+RELOAD_CHECK_SECONDS = 1.0
+RULE_FLAGS = re.IGNORECASE | re.MULTILINE
+GROUP_NAME = re.compile(r"\(\?P(<|=)([A-Za-z_]\w*)")
+
+
+def glob_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append("[^\n]*")
+        elif c == "?":
+            out.append("[^\n]")
+        elif c == "[":
+            j = pattern.find("]", i + 1 if i < n and pattern[i] in "!]" else i)
+            if j < 0:
+                out.append(re.escape(c))
+                continue
+            body = pattern[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if body.startswith("!"):
+                out.append(f"[^\n{body[1:]}]")
+            else:
+                out.append(f"[{body}]")
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def field_regex(pattern: str, rule_no: int):
+    if pattern.startswith("re:"):
+        groups = []
+
+        def rename(m):
+            if m.group(1) == "<":
+                groups.append(m.group(2))
+            return f"(?P{m.group(1)}r{rule_no}_{m.group(2)}"
+
+        body = GROUP_NAME.sub(rename, pattern[3:])
+        re.compile(body)
+        return f"(?:{body})", groups
+    return glob_regex(pattern), []
+
+
+def clean_segment(segment: str) -> str:
+    segment = re.sub(r"[^\w\-\. ]+", "_", segment).strip(" .")
+    return segment[:80]
+
+
+def clean_value(value) -> str:
+    return str(value or "").replace("\n", " ")
+
+
+def literal_prefix(pattern: str) -> str:
+    if pattern.startswith("re:"):
+        body = pattern[3:]
+        if "|" in body:
+            return ""
+        body = body[1:] if body.startswith("^") else body
+        while True:
+            m = re.match(r"\((?:\?:|\?P<\w+>|(?!\?))", body)
+            if not m:
+                break
+            body = body[m.end():]
+        prefix = re.match(r"[A-Za-z0-9 _\-]*", body).group(0)
+        rest = body[len(prefix):]
+        if rest[:1] in ("?", "*", "{"):
+            prefix = prefix[:-1]
+        elif rest[:1] == ")" and rest[1:2] in ("?", "*", "{"):
+            return ""
+        return prefix.lower()
+    prefix = re.match(r"[^*?\[]*", pattern).group(0)
+    return prefix.lower() if prefix.isascii() else ""
+
+
+def exact_value(pattern) -> str:
+    if pattern is None:
+        return ""
+    pattern = str(pattern)
+    if pattern.startswith("re:") or any(c in pattern for c in "*?[") or not pattern.isascii():
+        return ""
+    return pattern.lower()
+
+
+class CompiledRules:
+    def __init__(self, rules):
+        if isinstance(rules, dict):
+            rules = rules.get("rules")
+        if not isinstance(rules, list):
+            raise ValueError('expected a list of rules or {"rules": [...]}')
+        self.rules = []
+        self.by_prefix = {}
+        self.by_host = {}
+        self.by_method = {}
+        unindexed = []
+        for n, rule in enumerate(rules, start=1):
+            if not isinstance(rule, dict):
+                raise ValueError(f"rule {n}: expected an object")
+            unknown = set(rule) - RULE_KEYS
+            if unknown:
+                raise ValueError(f"rule {n}: unknown key(s) {', '.join(sorted(unknown))}")
+            template = rule.get("to")
+            if not isinstance(template, str) or not template.strip():
+                raise ValueError(f'rule {n}: "to" must be a subfolder template')
+            parts = []
+            groups = []
+            for field in ROUTE_FIELDS:
+                pattern = rule.get(field)
+                if pattern is None:
+                    parts.append("[^\n]*")
+                    continue
+                try:
+                    regex, found = field_regex(str(pattern), n)
+                except re.error as e:
+                    raise ValueError(f"rule {n}: bad {field} pattern: {e}")
+                parts.append(regex)
+                groups.extend(found)
+            for _, field, _, _ in string.Formatter().parse(template):
+                if field is not None and field not in TEMPLATE_FIELDS and field not in groups:
+                    raise ValueError(f"rule {n}: unknown template field {{{field}}}")
+            alternative = f"(?P<r{n}>{chr(10).join(parts)}\\Z)"
+            self.rules.append((template, [(f"r{n}_{g}", g) for g in groups], re.compile(alternative, RULE_FLAGS)))
+
+            prefix = literal_prefix(str(rule["name"])) if rule.get("name") is not None else ""
+            host = exact_value(rule.get("host"))
+            method = exact_value(rule.get("method"))
+            if prefix:
+                self.by_prefix.setdefault(len(prefix), {}).setdefault(prefix, []).append(n)
+            elif host:
+                self.by_host.setdefault(host, []).append(n)
+            elif method:
+                self.by_method.setdefault(method, []).append(n)
+            else:
+                unindexed.append(alternative)
+        self.unindexed = re.compile("|".join(unindexed), RULE_FLAGS) if unindexed else None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, values: dict):
+        key = "\n".join(clean_value(values.get(field)) for field in ROUTE_FIELDS)
+        name = clean_value(values.get("name")).lower()
+        candidates = []
+        for length, table in self.by_prefix.items():
+            candidates.extend(table.get(name[:length], ()))
+        candidates.extend(self.by_host.get(clean_value(values.get("host")).lower(), ()))
+        candidates.extend(self.by_method.get(clean_value(values.get("method")).lower(), ()))
+        found = None
+        for n in sorted(candidates):
+            m = self.rules[n - 1][2].match(key)
+            if m:
+                found = (n, m)
+                break
+        if self.unindexed is not None:
+            m = self.unindexed.match(key)
+            if m:
+                n = int(m.lastgroup[1:])
+                if found is None or n < found[0]:
+                    found = (n, m)
+        if found is None:
+            return None
+        n, m = found
+        template, groups, _ = self.rules[n - 1]
+        return n, template, {name: m.group(full) or "" for full, name in groups}
+
+
+class RoutingRules:
+    def __init__(self, path: str, log=None):
+        self.path = path
+        self.log = log
+        self.compiled = None
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK_SECONDS and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                self._reload()
+            finally:
+                self._lock.release()
+        return self.compiled
+
+    def _reload(self):
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return
+        self._signature = signature
+        if signature is None:
+            self._report(f"Routing rules not found: {self.path}" + ("; keeping the last good rules." if self.compiled else ""))
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                compiled = CompiledRules(json.load(f))
+        except (OSError, ValueError) as e:
+            self._report(f"Routing rules not loaded from {os.path.basename(self.path)}: {e}"
+                         + ("; keeping the last good rules." if self.compiled else ""))
+            return
+        reloaded = self.compiled is not None
+        self.compiled = compiled
+        self._report(f"Routing: {'reloaded' if reloaded else 'loaded'} {len(compiled)} rule(s) from {os.path.basename(self.path)}")
+
+    def _report(self, message: str):
+        if self.log:
+            self.log(message)
+
+    def route(self, name: str, method: str, source: str = None, url: str = None, extra: dict = None):
+        compiled = self.current()
+        if compiled is None:
+            return None
+        host = (urlparse(url).hostname or "") if url else ""
+        source = (source or "").replace(os.sep, "/")
+        found = compiled.match({"method": method, "source": source, "host": host, "url": url, "name": name})
+        if found is None:
+            return None
+        n, template, groups = found
+        stem, ext = os.path.splitext(name)
+        now = datetime.now()
+        values = {
+            "name": name,
+            "stem": stem,
+            "ext": ext.lstrip("."),
+            "method": method or "",
+            "host": host,
+            "source": os.path.basename(source.rstrip("/")),
+            "date": now.strftime("%Y-%m-%d"),
+            "year": now.strftime("%Y"),
+            "month": now.strftime("%m"),
+            "day": now.strftime("%d"),
+        }
+        values.update(extra or {})
+        values.update(groups)
+        try:
+            rendered = template.format_map(values)
+        except (KeyError, ValueError, IndexError) as e:
+            self._report(f"Routing rule {n} could not be applied to {name}: {e}")
+            return None
+        segments = [clean_segment(s) for s in re.split(r"[\\/]+", rendered)]
+        return "/".join(s for s in segments if s) or None
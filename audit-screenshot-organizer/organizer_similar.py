@@ -0,0 +1,215 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from organizer_integrity import meta_path, session_relpath
+from organizer_optimize import lower_priority
+from organizer_thumbs import list_session_images
+
+DUPLICATES_DIR = "_duplicates"
+PHASH_CACHE_NAME = "phash.tsv"
+DEFAULT_MAX_DISTANCE = 6
+HASH_CHUNK = 32
+PHASH_SIZE = 32
+PHASH_LOW = 8
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK")
+PHASH_SLACK = 3
+
+_dct = None
+
+
+def dct_matrix(n: int):
+    import numpy as np
+
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+
+
+def bits_to_int(bits) -> int:
+    import numpy as np
+
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def image_hashes(path: str):
+    global _dct
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("L", (PHASH_SIZE * 2, PHASH_SIZE * 2))
+        src = img if img.mode in REDUCE_MODES else img.convert("L")
+        factor = max(1, min(src.size) // (PHASH_SIZE * 2))
+        gray = (src.reduce(factor) if factor > 1 else src).convert("L")
+
+    d = np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16)
+    dhash = bits_to_int(d[:, 1:] > d[:, :-1])
+
+    if _dct is None:
+        _dct = dct_matrix(PHASH_SIZE)
+    p = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.BOX), dtype=np.float64)
+    low = (_dct @ p @ _dct.T)[:PHASH_LOW, :PHASH_LOW].ravel()
+    phash = bits_to_int(low > np.median(low[1:]))
+    return dhash, phash
+
+
+def hash_chunk(paths):
+    results = []
+    for path in paths:
+        try:
+            results.append((path, *image_hashes(path)))
+        except Exception:
+            results.append((path, None, None))
+    return results
+
+
+class MultiIndexHash:
+    def __init__(self, radius: int, bits: int = 64):
+        self.radius = radius
+        parts = min(bits, radius + 1)
+        bounds = [bits * k // parts for k in range(parts + 1)]
+        self.slices = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self.tables = [{} for _ in self.slices]
+        self.values = []
+
+    def add(self, value: int, item):
+        n = len(self.values)
+        self.values.append((value, item))
+        for table, (shift, mask) in zip(self.tables, self.slices):
+            table.setdefault((value >> shift) & mask, []).append(n)
+
+    def search(self, value: int):
+        found = []
+        seen = set()
+        for table, (shift, mask) in zip(self.tables, self.slices):
+            for n in table.get((value >> shift) & mask, ()):
+                if n in seen:
+                    continue
+                seen.add(n)
+                other, item = self.values[n]
+                d = (value ^ other).bit_count()
+                if d <= self.radius:
+                    found.append((item, d))
+        return found
+
+
+class PerceptualHashCache:
+    def __init__(self, session_folder: str):
+        self.path = meta_path(session_folder, PHASH_CACHE_NAME)
+        self.entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 5:
+                        name, size, mtime_ns, dhash, phash = parts
+                        self.entries[name] = (int(size), int(mtime_ns), int(dhash, 16), int(phash, 16))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, name: str, size: int, mtime_ns: int):
+        entry = self.entries.get(name)
+        if entry and entry[0] == size and entry[1] == mtime_ns:
+            return entry[2], entry[3]
+        return None
+
+    def add_many(self, rows):
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for name, size, mtime_ns, dhash, phash in rows:
+                self.entries[name] = (size, mtime_ns, dhash, phash)
+                f.write(f"{name}\t{size}\t{mtime_ns}\t{dhash:016x}\t{phash:016x}\n")
+
+
+def find_near_duplicates(session_folder: str, max_distance: int = DEFAULT_MAX_DISTANCE, workers: int = None) -> dict:
+    t0 = time.perf_counter()
+    images = [
+        item for item in list_session_images(session_folder)
+        if not session_relpath(item[0], session_folder).startswith(f"{DUPLICATES_DIR}/")
+    ]
+    cache = PerceptualHashCache(session_folder)
+    hashes = {}
+    stats = {}
+    todo = []
+    for path, mtime_ns, size in images:
+        name = session_relpath(path, session_folder)
+        stats[path] = (name, size, mtime_ns)
+        cached = cache.get(name, size, mtime_ns)
+        if cached:
+            hashes[path] = cached
+        else:
+            todo.append(path)
+
+    workers = workers or os.cpu_count() or 1
+    failed = []
+    fresh = []
+    if todo:
+        chunks = [todo[i:i + HASH_CHUNK] for i in range(0, len(todo), HASH_CHUNK)]
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=lower_priority) as pool:
+                results = [row for chunk in pool.map(hash_chunk, chunks) for row in chunk]
+        else:
+            results = [row for chunk in chunks for row in hash_chunk(chunk)]
+        for path, dhash, phash in results:
+            if dhash is None:
+                failed.append(stats[path][0])
+                continue
+            hashes[path] = (dhash, phash)
+            name, size, mtime_ns = stats[path]
+            fresh.append((name, size, mtime_ns, dhash, phash))
+        cache.add_many(fresh)
+    t_hashed = time.perf_counter()
+
+    paths = sorted(hashes, key=lambda p: (stats[p][2], stats[p][0]))
+    parent = list(range(len(paths)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = MultiIndexHash(max_distance)
+    closest = {}
+    for i, path in enumerate(paths):
+        dhash, phash = hashes[path]
+        for j, distance in index.search(dhash):
+            if (phash ^ hashes[paths[j]][1]).bit_count() > max_distance * PHASH_SLACK:
+                continue
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+            if i not in closest or distance < closest[i]:
+                closest[i] = distance
+        index.add(dhash, i)
+
+    members = {}
+    for i in range(len(paths)):
+        members.setdefault(find(i), []).append(i)
+
+    groups = []
+    for root, items in sorted(members.items()):
+        if len(items) < 2:
+            continue
+        groups.append({
+            "keep": stats[paths[root]][0],
+            "duplicates": [{"file": stats[paths[i]][0], "distance": closest.get(i, 0)} for i in items if i != root],
+        })
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "session": session_folder,
+        "images": len(images),
+        "hashed": len(fresh),
+        "cached": len(images) - len(todo),
+        "failed": failed,
+        "workers": workers,
+        "max_distance": max_distance,
+        "hash_seconds": round(t_hashed - t0, 3),
+        "seconds": round(elapsed, 3),
+        "groups": groups,
+        "extras": sum(len(g["duplicates"]) for g in groups),
+    }
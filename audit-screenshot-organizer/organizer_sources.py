@@ -0,0 +1,88 @@
+import fnmatch
+import os
+import re
+
+from organizer_integrity import META_DIR, TMP_SUFFIX
+
+DEFAULT_FILE_PATTERNS = ("*.png",)
+WILDCARDS = "*?["
+
+
+def normalize_pattern(pattern: str) -> str:
+    pattern = pattern.strip()
+    if pattern and not any(c in pattern for c in WILDCARDS):
+        return f"*.{pattern.lstrip('.').lower()}"
+    return pattern
+
+
+def parse_patterns(value) -> list:
+    parts = re.split(r"[\s,;]+", value) if isinstance(value, str) else list(value or ())
+    found = []
+    for part in parts:
+        pattern = normalize_pattern(part)
+        if pattern and pattern not in found:
+            found.append(pattern)
+    return found or list(DEFAULT_FILE_PATTERNS)
+
+
+class FileFilter:
+    def __init__(self, patterns=DEFAULT_FILE_PATTERNS):
+        self.patterns = tuple(parse_patterns(patterns))
+        suffixes = []
+        for pattern in self.patterns:
+            rest = pattern[1:] if pattern.startswith("*.") else ""
+            if not rest or any(c in rest for c in WILDCARDS):
+                suffixes = None
+                break
+            suffixes.append(rest.lower())
+        if suffixes:
+            self.suffixes = tuple(suffixes)
+            self.matches = self._match_suffix
+        else:
+            self.suffixes = None
+            self._regex = re.compile("|".join(fnmatch.translate(p) for p in self.patterns), re.IGNORECASE)
+            self.matches = self._match_regex
+
+    def _match_suffix(self, name: str) -> bool:
+        return name.lower().endswith(self.suffixes) and not name.endswith(TMP_SUFFIX)
+
+    def _match_regex(self, name: str) -> bool:
+        return self._regex.match(name) is not None and not name.endswith(TMP_SUFFIX)
+
+    def describe(self) -> str:
+        return " ".join(self.patterns)
+
+
+def folder_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def is_within(path_key: str, root_key: str) -> bool:
+    return path_key == root_key or path_key.startswith(root_key.rstrip(os.sep) + os.sep)
+
+
+def watch_roots(folders, recursive: bool) -> list:
+    roots = []
+    seen = set()
+    for folder in folders:
+        if not folder:
+            continue
+        key = folder_key(folder)
+        if key not in seen:
+            seen.add(key)
+            roots.append((key, folder))
+    if recursive:
+        roots = [(key, folder) for key, folder in roots if not any(other != key and is_within(key, other) for other, _ in roots)]
+    return [folder for _, folder in roots]
+
+
+class WatchExclusions:
+    def __init__(self, folders=()):
+        self.roots = tuple(folder_key(f) for f in folders if f)
+        self.marker = f"{os.sep}{META_DIR}{os.sep}"
+
+    def excluded(self, path: str) -> bool:
+        key = folder_key(path) + os.sep
+        if self.marker in key:
+            return True
+        return any(is_within(key, root) for root in self.roots)
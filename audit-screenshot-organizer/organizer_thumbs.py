@@ -0,0 +1,182 @@
+import hashlib
+import os
+import platform
+import threading
+import queue
+
+from organizer_integrity import META_DIR, TMP_SUFFIX
+
+THUMB_SIZE = 160
+THUMB_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_THUMB_WORKERS = 4
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif")
+
+
+def default_cache_dir() -> str:
+    sysname = platform.system()
+    if sysname == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        return os.path.join(base, "ScreenshotOrganizer", "Cache")
+    if sysname == "Darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Caches", "ScreenshotOrganizer")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "screenshot-organizer")
+
+
+def list_session_images(session_folder: str):
+    found = []
+    stack = [session_folder]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != META_DIR:
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        found.append((entry.path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    found.sort(key=lambda item: item[0].casefold())
+    return found
+
+
+def make_thumbnail(src_path: str, dest_path: str, size: int = THUMB_SIZE):
+    from PIL import Image
+
+    with Image.open(src_path) as img:
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        tmp_path = f"{dest_path}{TMP_SUFFIX}"
+        img.save(tmp_path, "PNG", compress_level=1)
+    os.replace(tmp_path, dest_path)
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir: str = None, max_bytes: int = THUMB_CACHE_MAX_BYTES, size: int = THUMB_SIZE):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "thumbs")
+        self.max_bytes = max_bytes
+        self.size = size
+        self._lock = threading.Lock()
+        self._total = None
+
+    def key_path(self, path: str, mtime_ns: int, file_size: int) -> str:
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{mtime_ns}|{file_size}|{self.size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def get(self, path: str, mtime_ns: int, file_size: int):
+        thumb = self.key_path(path, mtime_ns, file_size)
+        try:
+            os.utime(thumb)
+        except OSError:
+            return None
+        return thumb
+
+    def put(self, path: str, mtime_ns: int, file_size: int) -> str:
+        thumb = self.key_path(path, mtime_ns, file_size)
+        os.makedirs(os.path.dirname(thumb), exist_ok=True)
+        make_thumbnail(path, thumb, self.size)
+        added = os.path.getsize(thumb)
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+            else:
+                self._total += added
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+        return thumb
+
+    def _scan(self):
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as it:
+                        for entry in it:
+                            try:
+                                st = entry.stat()
+                            except OSError:
+                                continue
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+                            total += st.st_size
+        except FileNotFoundError:
+            pass
+        return entries, total
+
+    def evict(self):
+        with self._lock:
+            entries, total = self._scan()
+            target = int(self.max_bytes * 0.9)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total = total
+
+
+class ThumbnailLoader:
+    def __init__(self, cache: ThumbnailCache, deliver, workers: int = DEFAULT_THUMB_WORKERS):
+        self.cache = cache
+        self.deliver = deliver
+        self.wanted = set()
+        self._requests = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._threads = [threading.Thread(target=self._run, daemon=True, name=f"thumbs-{n}") for n in range(max(1, workers))]
+        self._closed = False
+        for t in self._threads:
+            t.start()
+
+    def set_visible(self, paths):
+        with self._lock:
+            self.wanted = set(paths)
+
+    def request(self, path: str, mtime_ns: int, file_size: int):
+        thumb = self.cache.get(path, mtime_ns, file_size)
+        if thumb:
+            self.deliver(path, thumb)
+            return
+        with self._lock:
+            if path in self._queued:
+                return
+            self._queued.add(path)
+        self._requests.put((path, mtime_ns, file_size))
+
+    def _run(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            path = item[0]
+            with self._lock:
+                self._queued.discard(path)
+                wanted = path in self.wanted
+            if not wanted or self._closed:
+                continue
+            try:
+                thumb = self.cache.put(*item)
+            except Exception:
+                thumb = None
+            if not self._closed:
+                self.deliver(path, thumb)
+
+    def close(self):
+        self._closed = True
+        for _ in self._threads:
+            self._requests.put(None)
@@ -0,0 +1,109 @@
+import errno
+import os
+import shutil
+
+from organizer_integrity import TMP_SUFFIX, hash_file, new_hasher
+
+COPY_CHUNK = 8 * 1024 * 1024
+
+
+class TransferError(OSError):
+    pass
+
+
+def fsync_folder(folder: str):
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def drop_cache(path: str):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def copy_hashed(src: str, tmp_path: str, durable: bool = False, chunk: int = COPY_CHUNK):
+    h = new_hasher()
+    buf = bytearray(chunk)
+    view = memoryview(buf)
+    copied = 0
+    with open(src, "rb", buffering=0) as fin, open(tmp_path, "wb", buffering=0) as fout:
+        before = os.fstat(fin.fileno())
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(fin.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        while True:
+            n = fin.readinto(buf)
+            if not n:
+                break
+            block = view[:n]
+            h.update(block)
+            while block:
+                block = block[fout.write(block):]
+            copied += n
+        if durable:
+            os.fsync(fout.fileno())
+        after = os.fstat(fin.fileno())
+    if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns) or copied != after.st_size:
+        raise TransferError(errno.EAGAIN, "source changed while it was being copied", src)
+    return h.hexdigest(), copied
+
+
+def move_file(src: str, dst: str, durable: bool = False, verify: bool = True):
+    try:
+        os.rename(src, dst)
+        if durable:
+            fsync_folder(os.path.dirname(dst))
+        return "rename", None
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    tmp_path = f"{dst}{TMP_SUFFIX}"
+    try:
+        digest, copied = copy_hashed(src, tmp_path, durable=durable)
+        written = os.stat(tmp_path).st_size
+        if written != copied:
+            raise TransferError(errno.EIO, f"copied {copied} bytes but {written} arrived", dst)
+        if verify:
+            drop_cache(tmp_path)
+            if hash_file(tmp_path) != digest:
+                raise TransferError(errno.EIO, "copy does not match the source", dst)
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if durable:
+        fsync_folder(os.path.dirname(dst))
+    try:
+        os.remove(src)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return "copy-kept-source", digest
+    return "copy", digest
@@ -1,19 +1,39 @@
+import argparse
+import json
 import os
 import platform
-import subprocess
-import shutil
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from datetime import datetime
-import threading
+import sys
 import time
+from datetime import datetime
 import queue
-import re
 
-DEFAULT_WINDOWS_SCREENSHOT = os.path.join(os.path.expanduser("~"), "Pictures", "Screenshots")
-DEFAULT_SCREENSHOT_FOLDER = DEFAULT_WINDOWS_SCREENSHOT
+try:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, simpledialog
+except ImportError:
+    tk = None
+
+from organizer_engine import (
+    DEFAULT_OUTPUT_FOLDER,
+    DEFAULT_SCREENSHOT_FOLDER,
+    OrganizerEngine,
+    SessionError,
+    can_use_imagegrab,
+    open_file,
+    open_folder,
+)
+from organizer_capture import (
+    DEFAULT_INTERVAL_SECONDS,
+    DEFAULT_MIN_CHANGE_PERCENT,
+    DEFAULT_PNG_COMPRESS_LEVEL,
+    monitor_choices,
+)
+from organizer_core import CoreClosed
+from organizer_integrity import DEDUP_MODES
+from organizer_optimize import OPTIMIZE_FORMATS
+from organizer_playwright import DEFAULT_IDLE_CAP, DEFAULT_NAV_TIMEOUT, DEFAULT_WAIT, parse_viewports, parse_wait
+from organizer_sources import DEFAULT_FILE_PATTERNS, parse_patterns
+from organizer_thumbs import THUMB_SIZE, ThumbnailCache, ThumbnailLoader, list_session_images
 
 BG = "#0A0E17"
 PANEL = "#121826"
@@ -39,6 +59,8 @@ TOOLBAR_BTN_BG = "#1B2740"
 TOOLBAR_BTN_HOVER = "#243253"
 TOOLBAR_BTN_ACTIVE = "#2F4270"
 LOG_MAX_LINES = 400
+LOG_DRAIN_PER_TICK = 5000
+UI_CALL_TICK_MS = 16
 
 
 def default_font_family() -> str:
@@ -50,55 +72,11 @@ def default_font_family() -> str:
     return "Noto Sans"
 
 
-def ensure_unique_path(dest_path: str) -> str:
-    if not os.path.exists(dest_path):
-        return dest_path
-    base, ext = os.path.splitext(dest_path)
-    i = 1
-    while True:
-        candidate = f"{base} ({i}){ext}"
-        if not os.path.exists(candidate):
-            return candidate
-        i += 1
-
-
-def open_folder(path: str):
-    if not path or not os.path.isdir(path):
-        return
-    sysname = platform.system()
-    if sysname == "Darwin":
-        subprocess.run(["open", path], check=False)
-    elif sysname == "Windows":
-        os.startfile(path)
-    else:
-        subprocess.run(["xdg-open", path], check=False)
-
-
-def can_use_imagegrab() -> bool:
-    try:
-        from PIL import ImageGrab
-        return True
-    except Exception:
-        return False
-
-
-class ScreenshotHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        self.app = app
-
-    def on_created(self, event):
-        if event.is_directory:
-            return
-        filename = os.path.basename(event.src_path).lower()
-        if filename.endswith(".png"):
-            self.app.file_queue.put(event.src_path)
-
-
 class MiniToolbar:
     def __init__(self, app):
         self.app = app
         self.win = tk.Toplevel(app.root)
-        self.win.geometry("640x68+220+120")
+        self.win.geometry("740x68+220+120")
         self.win.configure(bg=TOOLBAR_BG)
         self.win.attributes("-topmost", True)
         try:
@@ -164,6 +142,8 @@ class MiniToolbar:
 
         mkbtn("Region", self.capture_region).pack(side="left", padx=(0, 8))
         mkbtn("Full Screen", self.capture_full).pack(side="left", padx=(0, 8))
+        self.interval_btn = mkbtn("Interval", self.toggle_interval)
+        self.interval_btn.pack(side="left", padx=(0, 8))
         mkbtn("New Session", self.app.new_session).pack(side="left", padx=(0, 8))
         mkbtn("Open Folder", self.open_current_folder).pack(side="left", padx=(0, 8))
         mkbtn("Hide", self.hide).pack(side="left")
@@ -202,45 +182,30 @@ class MiniToolbar:
         self.status.set(s)
 
     def open_current_folder(self):
-        self.app.ensure_session()
+        if not self.app.ensure_session():
+            return
         open_folder(self.app.active_session_folder)
 
-    def _run_screencapture(self, args, out_path):
-        try:
-            res = subprocess.run(args, capture_output=True, text=True)
-            ok = os.path.exists(out_path) and os.path.getsize(out_path) > 0 and res.returncode == 0
-            if ok:
-                self.app.ui_log(f"Saved: {os.path.basename(out_path)}")
-                self.app.root.after(0, lambda: self.set_status("Saved"))
-                return
+    def grabbed(self):
+        if self.status.get() in ("Capturing…", "Select region…"):
+            self.set_status("Grabbed")
 
-            stderr = (res.stderr or "").strip()
-            if os.path.exists(out_path) and os.path.getsize(out_path) == 0:
-                try:
-                    os.remove(out_path)
-                except Exception:
-                    pass
+    def saved(self, ok: bool):
+        self.app.ui_call(self.set_status, "Saved" if ok else "Failed")
 
-            if stderr:
-                self.app.ui_log(f"Capture failed: {stderr}")
-            else:
-                self.app.ui_log("Capture failed.")
-            self.app.root.after(0, lambda: self.set_status("Failed"))
-        except Exception as e:
-            self.app.ui_log(f"Capture error: {e}")
-            self.app.root.after(0, lambda: self.set_status("Failed"))
+    def _run_screencapture(self, args, out_path, method):
+        ok = self.app.engine.run_screencapture(args, out_path, method)
+        self.app.ui_call(self.set_status, "Saved" if ok else "Failed")
 
     def capture_region(self):
-        self.app.ensure_session()
-        out_path = ensure_unique_path(os.path.join(self.app.active_session_folder, f"{self.app.timestamp()}_region.png"))
+        if not self.app.ensure_session():
+            return
+        self.app.sync_engine()
+        out_path = self.app.engine.capture_path("region")
 
         if platform.system() == "Darwin":
             self.set_status("Select region…")
-            threading.Thread(
-                target=self._run_screencapture,
-                args=(["screencapture", "-i", "-x", out_path], out_path),
-                daemon=True,
-            ).start()
+            self.app.run_background(self._run_screencapture, ["screencapture", "-i", "-x", out_path], out_path, "region", lane="capture")
             return
 
         if not can_use_imagegrab():
@@ -308,23 +273,15 @@ class MiniToolbar:
 
             def do_grab():
                 try:
-                    from PIL import ImageGrab
-                    img = ImageGrab.grab(bbox=(left, top, right, bottom))
-                    img.save(out_path, "PNG")
-                    ok = os.path.exists(out_path) and os.path.getsize(out_path) > 0
-                    if ok:
-                        self.app.ui_log(f"Saved: {os.path.basename(out_path)}")
-                        self.app.root.after(0, lambda: self.set_status("Saved"))
-                    else:
-                        self.app.ui_log("Capture failed.")
-                        self.app.root.after(0, lambda: self.set_status("Failed"))
+                    self.app.engine.grab_screen(out_path, bbox=(left, top, right, bottom), method="region", on_saved=self.saved)
+                    self.app.ui_call(self.grabbed)
                 except Exception as ex:
                     self.app.ui_log(f"Capture error: {ex}")
-                    self.app.root.after(0, lambda: self.set_status("Failed"))
+                    self.app.ui_call(self.set_status, "Failed")
                 finally:
-                    self.app.root.after(0, self.show)
+                    self.app.ui_call(self.show)
 
-            threading.Thread(target=do_grab, daemon=True).start()
+            self.app.run_background(do_grab, lane="capture")
 
         overlay.bind("<Escape>", lambda _e: cancel())
         canvas.bind("<ButtonPress-1>", down)
@@ -332,19 +289,10 @@ class MiniToolbar:
         canvas.bind("<ButtonRelease-1>", up)
 
     def capture_full(self):
-        self.app.ensure_session()
-        out_path = ensure_unique_path(os.path.join(self.app.active_session_folder, f"{self.app.timestamp()}_full.png"))
-
-        if platform.system() == "Darwin":
-            self.set_status("Capturing…")
-            threading.Thread(
-                target=self._run_screencapture,
-                args=(["screencapture", "-x", out_path], out_path),
-                daemon=True,
-            ).start()
+        if not self.app.ensure_session():
             return
-
-        if not can_use_imagegrab():
+        self.app.sync_engine()
+        if platform.system() != "Darwin" and not can_use_imagegrab():
             self.app.ui_log("Full screen capture requires Pillow. Install with: pip install pillow")
             self.set_status("Failed")
             return
@@ -352,22 +300,205 @@ class MiniToolbar:
         self.set_status("Capturing…")
 
         def do_full():
-            try:
-                from PIL import ImageGrab
-                img = ImageGrab.grab()
-                img.save(out_path, "PNG")
-                ok = os.path.exists(out_path) and os.path.getsize(out_path) > 0
-                if ok:
-                    self.app.ui_log(f"Saved: {os.path.basename(out_path)}")
-                    self.app.root.after(0, lambda: self.set_status("Saved"))
-                else:
-                    self.app.ui_log("Capture failed.")
-                    self.app.root.after(0, lambda: self.set_status("Failed"))
-            except Exception as ex:
-                self.app.ui_log(f"Full capture error: {ex}")
-                self.app.root.after(0, lambda: self.set_status("Failed"))
-
-        threading.Thread(target=do_full, daemon=True).start()
+            ok = self.app.engine.capture_full(on_saved=self.saved)
+            if not ok:
+                self.app.ui_call(self.set_status, "Failed")
+            elif platform.system() != "Darwin":
+                self.app.ui_call(self.grabbed)
+
+        self.app.run_background(do_full, lane="capture")
+
+    def toggle_interval(self):
+        engine = self.app.engine
+        if engine.interval_capture is not None and engine.interval_capture.running():
+            engine.stop_interval(timeout=0)
+            self.set_status("Stopping…")
+            return
+        if not self.app.ensure_session():
+            return
+        self.app.sync_engine()
+        if engine.start_interval(on_frame=self.interval_progress):
+            self.interval_btn.configure(text="Stop")
+            self.set_status("Interval…")
+        else:
+            self.set_status("Failed")
+
+    def interval_progress(self, capture):
+        def update():
+            if capture.stopped.is_set():
+                self.interval_btn.configure(text="Interval")
+            self.set_status(f"{capture.saved} saved / {capture.skipped} skipped")
+
+        self.app.ui_call(update)
+
+
+class SessionGallery:
+    CELL_W = THUMB_SIZE + 28
+    CELL_H = THUMB_SIZE + 44
+
+    def __init__(self, app):
+        self.app = app
+        self.win = tk.Toplevel(app.root)
+        self.win.title("Session Gallery")
+        self.win.geometry("920x640")
+        self.win.configure(bg=BG)
+
+        self.images = []
+        self.index_of = {}
+        self.items = {}
+        self.photos = {}
+        self.cols = 0
+        self._render_pending = False
+        self.closed = False
+        self.loader = ThumbnailLoader(ThumbnailCache(), self._deliver)
+
+        header = tk.Frame(self.win, bg=PANEL_ALT, highlightthickness=1, highlightbackground=BORDER)
+        header.pack(fill="x", padx=10, pady=(10, 6))
+        self.title = tk.Label(header, text="", bg=PANEL_ALT, fg=TEXT, font=(app.font_family, 11, "bold"))
+        self.title.pack(side="left", padx=12, pady=8)
+        ttk.Button(header, text="Refresh", command=self.refresh).pack(side="right", padx=10, pady=6)
+
+        body = tk.Frame(self.win, bg=BG)
+        body.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.canvas = tk.Canvas(body, bg=LOG_BG, highlightthickness=1, highlightbackground=BORDER)
+        self.scroll = ttk.Scrollbar(body, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.scroll.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda _e: self.schedule_render())
+        self.canvas.bind("<Double-Button-1>", self.open_clicked)
+        if platform.system() == "Linux":
+            self.canvas.bind("<Button-4>", lambda _e: self.canvas.yview_scroll(-1, "units"))
+            self.canvas.bind("<Button-5>", lambda _e: self.canvas.yview_scroll(1, "units"))
+        else:
+            self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.win.bind("<Escape>", lambda _e: self.close())
+
+        self.refresh()
+
+    def _on_yscroll(self, first, last):
+        self.scroll.set(first, last)
+        self.schedule_render()
+
+    def _on_mousewheel(self, event):
+        if event.delta == 0:
+            return
+        if platform.system() == "Darwin":
+            units = 1 if event.delta < 0 else -1
+        else:
+            units = int(-1 * (event.delta / 120)) or (1 if event.delta < 0 else -1)
+        self.canvas.yview_scroll(units, "units")
+
+    def refresh(self):
+        folder = self.app.active_session_folder
+        self.title.config(text=f"{os.path.basename(folder) or 'No session'} — loading…")
+
+        def scan():
+            images = list_session_images(folder) if folder else []
+            self.app.ui_call(self._set_images, folder, images)
+
+        self.app.run_background(scan, lane="scan")
+
+    def _set_images(self, folder, images):
+        if self.closed:
+            return
+        self.images = images
+        self.index_of = {path: i for i, (path, _, _) in enumerate(images)}
+        self.canvas.delete("all")
+        self.items = {}
+        self.photos = {}
+        self.cols = 0
+        self.title.config(text=f"{os.path.basename(folder) or 'No session'} — {len(images)} image(s)")
+        self.canvas.yview_moveto(0)
+        self.schedule_render()
+
+    def schedule_render(self):
+        if self._render_pending:
+            return
+        self._render_pending = True
+        self.win.after(16, self.render)
+
+    def render(self):
+        self._render_pending = False
+        if self.closed:
+            return
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        cols = max(1, width // self.CELL_W)
+        rows = (len(self.images) + cols - 1) // cols
+        if cols != self.cols:
+            self.cols = cols
+            self.canvas.delete("all")
+            self.items = {}
+            self.photos = {}
+            self.canvas.configure(scrollregion=(0, 0, cols * self.CELL_W, max(height, rows * self.CELL_H)))
+
+        top = int(self.canvas.canvasy(0))
+        first_row = max(0, top // self.CELL_H - 1)
+        last_row = min(rows - 1, (top + height) // self.CELL_H + 1)
+        visible = set(range(first_row * cols, min(len(self.images), (last_row + 1) * cols)))
+
+        for i in list(self.items):
+            if i not in visible:
+                self.canvas.delete(f"cell{i}")
+                del self.items[i]
+                self.photos.pop(i, None)
+
+        self.loader.set_visible(self.images[i][0] for i in visible)
+
+        for i in sorted(visible - self.items.keys()):
+            path, mtime_ns, size = self.images[i]
+            x = (i % cols) * self.CELL_W
+            y = (i // cols) * self.CELL_H
+            tag = f"cell{i}"
+            self.canvas.create_rectangle(x + 6, y + 6, x + self.CELL_W - 6, y + THUMB_SIZE + 14, fill=PANEL, outline=BORDER, tags=(tag,))
+            name = os.path.basename(path)
+            label = name if len(name) <= 26 else f"{name[:12]}…{name[-12:]}"
+            self.canvas.create_text(x + self.CELL_W / 2, y + THUMB_SIZE + 28, text=label, fill=MUTED, font=(self.app.font_family, 9), tags=(tag,))
+            self.items[i] = path
+            self.loader.request(path, mtime_ns, size)
+
+    def _deliver(self, path, thumb):
+        self.app.ui_call(self._show_thumb, path, thumb)
+
+    def _show_thumb(self, path, thumb):
+        i = self.index_of.get(path)
+        if self.closed or i is None or self.items.get(i) != path or not thumb:
+            return
+        try:
+            photo = tk.PhotoImage(file=thumb)
+        except Exception:
+            return
+        self.photos[i] = photo
+        x = (i % self.cols) * self.CELL_W
+        y = (i // self.cols) * self.CELL_H
+        self.canvas.create_image(x + self.CELL_W / 2, y + 10 + THUMB_SIZE / 2, image=photo, tags=(f"cell{i}",))
+
+    def open_clicked(self, event):
+        x = int(self.canvas.canvasx(event.x))
+        y = int(self.canvas.canvasy(event.y))
+        col = x // self.CELL_W
+        if col >= self.cols:
+            return
+        i = (y // self.CELL_H) * self.cols + col
+        if 0 <= i < len(self.images):
+            open_file(self.images[i][0])
+
+    def show(self):
+        self.win.deiconify()
+        self.win.lift()
+        self.refresh()
+
+    def close(self):
+        self.closed = True
+        self.loader.close()
+        self.app.gallery = None
+        try:
+            self.win.destroy()
+        except Exception:
+            pass
 
 
 class ScreenshotOrganizerApp:
@@ -385,29 +516,47 @@ class ScreenshotOrganizerApp:
         self.session_number = tk.IntVar(value=1)
 
         self.screenshot_folder = tk.StringVar(value=DEFAULT_SCREENSHOT_FOLDER)
-        self.output_base_folder = tk.StringVar(value=os.path.join(os.path.expanduser("~"), "Documents", "Evidence"))
+        self.output_base_folder = tk.StringVar(value=DEFAULT_OUTPUT_FOLDER)
+        self.watch_recursive = tk.BooleanVar(value=False)
+        self.file_patterns = tk.StringVar(value=" ".join(DEFAULT_FILE_PATTERNS))
+        self.routing_rules_path = tk.StringVar(value="")
+        self.catchup_enabled = tk.BooleanVar(value=False)
+        self.catchup_hours = tk.StringVar(value="24")
+        self.dedup_mode = tk.StringVar(value="skip")
+        self.optimize_format = tk.StringVar(value="off")
+        self.optimize_workers = tk.StringVar(value="1")
+        self.capture_monitor = tk.StringVar(value="primary")
+        self.png_compress_level = tk.StringVar(value=str(DEFAULT_PNG_COMPRESS_LEVEL))
+        self.interval_seconds = tk.StringVar(value=f"{DEFAULT_INTERVAL_SECONDS:g}")
+        self.interval_frames = tk.StringVar(value="0")
+        self.interval_min_change = tk.StringVar(value=f"{DEFAULT_MIN_CHANGE_PERCENT:g}")
 
         self.mode = tk.StringVar(value="manual")
         self.pw_url = tk.StringVar(value="https://example.com")
         self.pw_fullpage = tk.BooleanVar(value=True)
         self.pw_selector = tk.StringVar(value="")
+        self.pw_concurrency = tk.IntVar(value=4)
+        self.pw_wait = tk.StringVar(value=DEFAULT_WAIT)
+        self.pw_block = tk.StringVar(value="")
+        self.pw_all_matches = tk.BooleanVar(value=False)
+        self.pw_viewports = tk.StringVar(value="")
 
-        self.active_session_folder = ""
-        self.observer = None
-        self.running = False
         self.toolbar = None
         self.toolbar_visible = False
+        self.gallery = None
 
-        self.file_queue = queue.Queue()
         self.ui_log_queue = queue.Queue()
+        self.ui_call_queue = queue.Queue()
 
-        threading.Thread(target=self.process_queue, daemon=True).start()
+        self.engine = OrganizerEngine(log=self.ui_log_queue.put)
+        self.engine.start()
 
         self.setup_style()
         self.build_scrollable_root()
         self.build_gui(self.content)
 
         self.root.after(60, self.pump_ui_logs)
+        self.root.after(UI_CALL_TICK_MS, self.pump_ui_calls)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.update_status()
 
@@ -447,6 +596,8 @@ class ScreenshotOrganizerApp:
 
         style.configure("TCheckbutton", background=BG, foreground=TEXT, font=(self.font_family, 10))
         style.map("TCheckbutton", foreground=[("active", TEXT)])
+        style.configure("Panel.TCheckbutton", background=PANEL)
+        style.map("Panel.TCheckbutton", background=[("active", PANEL)])
 
         style.configure("Vertical.TScrollbar", background=PANEL_ALT, troughcolor=BG, bordercolor=BG, arrowcolor=MUTED)
 
@@ -588,7 +739,7 @@ class ScreenshotOrganizerApp:
         add_row(1, "Audit Type:", self.audit_type, 0)
         add_row(1, "Start Index:", self.session_number, 2)
 
-        ttk.Label(top_panel, text="Screenshot Folder (Source):", style="TLabel").grid(row=2, column=0, sticky="w", padx=10, pady=8)
+        ttk.Label(top_panel, text="Screenshot Folder(s) (Source):", style="TLabel").grid(row=2, column=0, sticky="w", padx=10, pady=8)
         ttk.Entry(top_panel, textvariable=self.screenshot_folder, width=46).grid(row=2, column=1, sticky="w", padx=10, pady=8, columnspan=2)
         ttk.Button(top_panel, text="Browse", command=self.select_screenshot_folder).grid(row=2, column=3, sticky="w", padx=10, pady=8)
 
@@ -596,6 +747,49 @@ class ScreenshotOrganizerApp:
         ttk.Entry(top_panel, textvariable=self.output_base_folder, width=46).grid(row=3, column=1, sticky="w", padx=10, pady=8, columnspan=2)
         ttk.Button(top_panel, text="Browse", command=self.select_output_folder).grid(row=3, column=3, sticky="w", padx=10, pady=8)
 
+        ttk.Checkbutton(top_panel, text="File existing screenshots on start", variable=self.catchup_enabled, style="Panel.TCheckbutton").grid(
+            row=4, column=0, columnspan=2, sticky="w", padx=10, pady=8
+        )
+        ttk.Label(top_panel, text="From last (hours, 0 = all):", style="TLabel").grid(row=4, column=2, sticky="w", padx=10, pady=8)
+        ttk.Entry(top_panel, textvariable=self.catchup_hours, width=8).grid(row=4, column=3, sticky="w", padx=10, pady=8)
+
+        ttk.Label(top_panel, text="Identical duplicates:", style="TLabel").grid(row=5, column=0, sticky="w", padx=10, pady=8)
+        ttk.Combobox(top_panel, textvariable=self.dedup_mode, values=DEDUP_MODES, state="readonly", width=10).grid(
+            row=5, column=1, sticky="w", padx=10, pady=8
+        )
+        ttk.Label(top_panel, text="Optimize PNGs:", style="TLabel").grid(row=5, column=2, sticky="w", padx=10, pady=8)
+        optimize_row = ttk.Frame(top_panel, style="Panel.TFrame")
+        optimize_row.grid(row=5, column=3, sticky="w", padx=10, pady=8)
+        ttk.Combobox(optimize_row, textvariable=self.optimize_format, values=OPTIMIZE_FORMATS, state="readonly", width=6).pack(side="left")
+        ttk.Label(optimize_row, text="CPUs:", style="TLabel").pack(side="left", padx=(10, 6))
+        ttk.Entry(optimize_row, textvariable=self.optimize_workers, width=4).pack(side="left")
+
+        ttk.Label(top_panel, text="Full screen monitor:", style="TLabel").grid(row=6, column=0, sticky="w", padx=10, pady=8)
+        ttk.Combobox(top_panel, textvariable=self.capture_monitor, values=monitor_choices(), width=10).grid(
+            row=6, column=1, sticky="w", padx=10, pady=8
+        )
+        ttk.Label(top_panel, text="PNG compression (0-9):", style="TLabel").grid(row=6, column=2, sticky="w", padx=10, pady=8)
+        ttk.Entry(top_panel, textvariable=self.png_compress_level, width=8).grid(row=6, column=3, sticky="w", padx=10, pady=8)
+
+        ttk.Label(top_panel, text="Interval (seconds):", style="TLabel").grid(row=7, column=0, sticky="w", padx=10, pady=8)
+        interval_row = ttk.Frame(top_panel, style="Panel.TFrame")
+        interval_row.grid(row=7, column=1, sticky="w", padx=10, pady=8)
+        ttk.Entry(interval_row, textvariable=self.interval_seconds, width=6).pack(side="left")
+        ttk.Label(interval_row, text="Frames (0 = until stopped):", style="TLabel").pack(side="left", padx=(10, 6))
+        ttk.Entry(interval_row, textvariable=self.interval_frames, width=6).pack(side="left")
+        ttk.Label(top_panel, text="Skip if changed < (%):", style="TLabel").grid(row=7, column=2, sticky="w", padx=10, pady=8)
+        ttk.Entry(top_panel, textvariable=self.interval_min_change, width=8).grid(row=7, column=3, sticky="w", padx=10, pady=8)
+
+        ttk.Label(top_panel, text="File types:", style="TLabel").grid(row=8, column=0, sticky="w", padx=10, pady=8)
+        ttk.Entry(top_panel, textvariable=self.file_patterns, width=22).grid(row=8, column=1, sticky="w", padx=10, pady=8)
+        ttk.Checkbutton(top_panel, text="Include subfolders", variable=self.watch_recursive, style="Panel.TCheckbutton").grid(
+            row=8, column=2, columnspan=2, sticky="w", padx=10, pady=8
+        )
+
+        ttk.Label(top_panel, text="Routing rules (optional):", style="TLabel").grid(row=9, column=0, sticky="w", padx=10, pady=8)
+        ttk.Entry(top_panel, textvariable=self.routing_rules_path, width=46).grid(row=9, column=1, sticky="w", padx=10, pady=8, columnspan=2)
+        ttk.Button(top_panel, text="Browse", command=self.select_routing_rules).grid(row=9, column=3, sticky="w", padx=10, pady=8)
+
         mode_shell = tk.Frame(outer, bg=PANEL_ALT, highlightthickness=1, highlightbackground=BORDER)
         mode_shell.pack(fill="x", pady=(0, 8), padx=14)
         mode_frame = tk.Frame(mode_shell, bg=PANEL_ALT)
@@ -615,8 +809,21 @@ class ScreenshotOrganizerApp:
         ttk.Entry(self.pw_frame, textvariable=self.pw_url, width=58).grid(row=0, column=1, sticky="w", padx=10, pady=6)
         ttk.Button(self.pw_frame, text="Capture Now", command=self.capture_now).grid(row=0, column=2, sticky="w", padx=10, pady=6)
         ttk.Checkbutton(self.pw_frame, text="Full page", variable=self.pw_fullpage).grid(row=1, column=1, sticky="w", padx=10, pady=4)
-        ttk.Label(self.pw_frame, text="Element selector (optional):", style="Root.TLabel").grid(row=2, column=0, sticky="w", padx=0, pady=6)
+        ttk.Label(self.pw_frame, text="Element selectors (optional, ; separated):", style="Root.TLabel").grid(row=2, column=0, sticky="w", padx=0, pady=6)
         ttk.Entry(self.pw_frame, textvariable=self.pw_selector, width=34).grid(row=2, column=1, sticky="w", padx=10, pady=6)
+        ttk.Checkbutton(self.pw_frame, text="Every match", variable=self.pw_all_matches).grid(row=2, column=2, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="Batch concurrency:", style="Root.TLabel").grid(row=3, column=0, sticky="w", padx=0, pady=6)
+        ttk.Entry(self.pw_frame, textvariable=self.pw_concurrency, width=6).grid(row=3, column=1, sticky="w", padx=10, pady=6)
+        ttk.Button(self.pw_frame, text="Capture URL List…", command=self.capture_batch).grid(row=3, column=2, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="Ready when:", style="Root.TLabel").grid(row=4, column=0, sticky="w", padx=0, pady=6)
+        ttk.Entry(self.pw_frame, textvariable=self.pw_wait, width=34).grid(row=4, column=1, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="load, domcontentloaded, networkidle[:cap], selector:CSS, settle:SECONDS — join with +", style="MutedRoot.TLabel").grid(row=4, column=2, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="Block requests:", style="Root.TLabel").grid(row=5, column=0, sticky="w", padx=0, pady=6)
+        ttk.Entry(self.pw_frame, textvariable=self.pw_block, width=34).grid(row=5, column=1, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="trackers, resource types (font media image) or URL globs", style="MutedRoot.TLabel").grid(row=5, column=2, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="Viewports (optional):", style="Root.TLabel").grid(row=6, column=0, sticky="w", padx=0, pady=6)
+        ttk.Entry(self.pw_frame, textvariable=self.pw_viewports, width=34).grid(row=6, column=1, sticky="w", padx=10, pady=6)
+        ttk.Label(self.pw_frame, text="e.g. desktop mobile or 1366x768 390x844 — one page load for all", style="MutedRoot.TLabel").grid(row=6, column=2, sticky="w", padx=10, pady=6)
 
         button_shell = tk.Frame(outer, bg=PANEL, highlightthickness=1, highlightbackground=BORDER)
         button_shell.pack(fill="x", pady=(8, 10), padx=14)
@@ -630,7 +837,12 @@ class ScreenshotOrganizerApp:
         self.toggle_toolbar_btn = ttk.Button(button_frame, text="Show Mini Toolbar", command=self.toggle_toolbar)
         self.toggle_toolbar_btn.pack(side="left", padx=(0, 10))
 
-        ttk.Button(button_frame, text="Open Session Folder", command=self.open_session_folder).pack(side="left")
+        ttk.Button(button_frame, text="Open Session Folder", command=self.open_session_folder).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="Gallery", command=self.show_gallery).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="Verify Session", command=self.verify_session).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="Near Duplicates", command=self.find_near_duplicates).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="Search", command=self.search_catalog).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="Export", command=self.export_session).pack(side="left")
 
         self.current_session_label = tk.Label(outer, text="Current Session: None", bg=BG, fg=MUTED, font=(self.font_family, 11, "bold"))
         self.current_session_label.pack(pady=(0, 10), anchor="w", padx=14)
@@ -661,6 +873,7 @@ class ScreenshotOrganizerApp:
             if self.running:
                 self.stop_watching()
             self.pw_shell.pack(fill="x", pady=(0, 6), padx=14)
+            self.engine.warm_playwright()
         self.update_status()
 
     def on_toolbar_visibility_changed(self, visible: bool):
@@ -677,41 +890,152 @@ class ScreenshotOrganizerApp:
         else:
             self.toolbar.show()
 
+    @property
+    def active_session_folder(self) -> str:
+        return self.engine.active_session_folder
+
+    @property
+    def running(self) -> bool:
+        return self.engine.running
+
     def ui_log(self, message: str):
-        now = datetime.now().strftime("%H:%M:%S")
-        self.ui_log_queue.put(f"[{now}] {message}")
+        self.engine.log(message)
 
     def pump_ui_logs(self):
-        drained = 0
+        lines = []
         try:
-            while drained < 50:
-                msg = self.ui_log_queue.get_nowait()
-                self.log.configure(state="normal")
-                self.log.insert(tk.END, f"{msg}\n")
-                line_count = int(self.log.index("end-1c").split(".")[0])
-                if line_count > LOG_MAX_LINES:
-                    extra = line_count - LOG_MAX_LINES
-                    self.log.delete("1.0", f"{extra + 1}.0")
-                self.log.see(tk.END)
-                self.log.configure(state="disabled")
-                drained += 1
+            while len(lines) < LOG_DRAIN_PER_TICK:
+                lines.append(self.ui_log_queue.get_nowait())
         except queue.Empty:
             pass
+        if lines:
+            lines = lines[-LOG_MAX_LINES:]
+            self.log.configure(state="normal")
+            self.log.insert(tk.END, "\n".join(lines) + "\n")
+            line_count = int(self.log.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                extra = line_count - LOG_MAX_LINES
+                self.log.delete("1.0", f"{extra + 1}.0")
+            self.log.see(tk.END)
+            self.log.configure(state="disabled")
         self.root.after(60, self.pump_ui_logs)
 
+    def ui_call(self, fn, *args):
+        self.ui_call_queue.put((fn, args))
+
+    def pump_ui_calls(self):
+        try:
+            while True:
+                fn, args = self.ui_call_queue.get_nowait()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.ui_log(f"UI update error: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(UI_CALL_TICK_MS, self.pump_ui_calls)
+
+    def run_background(self, fn, *args, lane: str = "task"):
+        try:
+            future = self.engine.core.run_blocking(fn, *args, lane=lane)
+        except CoreClosed:
+            return None
+        future.add_done_callback(self._background_done)
+        return future
+
+    def _background_done(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.ui_log(f"Background task error: {error}")
+
     def select_screenshot_folder(self):
         folder = filedialog.askdirectory()
         if folder:
             self.screenshot_folder.set(folder)
 
+    def select_routing_rules(self):
+        path = filedialog.askopenfilename(filetypes=[("Routing rules", "*.json"), ("All files", "*.*")])
+        if path:
+            self.routing_rules_path.set(path)
+
     def select_output_folder(self):
         folder = filedialog.askdirectory()
         if folder:
             self.output_base_folder.set(folder)
 
-    def ensure_session(self):
-        if not self.active_session_folder:
-            self.create_session_folder()
+    def sync_engine(self):
+        e = self.engine
+        e.year = self.year.get()
+        e.project = self.project.get()
+        e.audit_type = self.audit_type.get()
+        try:
+            e.session_number = int(self.session_number.get())
+        except Exception:
+            e.session_number = None
+        folders = [f.strip() for f in self.screenshot_folder.get().split(os.pathsep) if f.strip()]
+        e.screenshot_folder = folders[0] if folders else ""
+        e.source_folders = folders[1:]
+        e.watch_recursive = bool(self.watch_recursive.get())
+        e.file_patterns = parse_patterns(self.file_patterns.get())
+        e.routing_rules_path = self.routing_rules_path.get().strip()
+        e.output_base_folder = self.output_base_folder.get()
+        e.catchup_enabled = bool(self.catchup_enabled.get())
+        e.dedup_mode = self.dedup_mode.get()
+        e.optimize_format = self.optimize_format.get()
+        try:
+            e.optimize_workers = max(1, int(self.optimize_workers.get()))
+        except ValueError:
+            e.optimize_workers = 1
+        e.capture_monitor = self.capture_monitor.get().strip() or "primary"
+        try:
+            e.png_compress_level = min(9, max(0, int(self.png_compress_level.get())))
+        except ValueError:
+            e.png_compress_level = DEFAULT_PNG_COMPRESS_LEVEL
+        try:
+            e.interval_seconds = max(0.05, float(self.interval_seconds.get()))
+        except ValueError:
+            e.interval_seconds = DEFAULT_INTERVAL_SECONDS
+        try:
+            e.interval_frames = max(0, int(self.interval_frames.get()))
+        except ValueError:
+            e.interval_frames = 0
+        try:
+            e.interval_min_change = max(0.0, float(self.interval_min_change.get()))
+        except ValueError:
+            e.interval_min_change = DEFAULT_MIN_CHANGE_PERCENT
+        try:
+            e.catchup_hours = max(0.0, float(self.catchup_hours.get()))
+        except ValueError:
+            e.catchup_hours = 24.0
+        e.pw_url = self.pw_url.get()
+        e.pw_fullpage = bool(self.pw_fullpage.get())
+        e.pw_selector = self.pw_selector.get()
+        try:
+            e.pw_concurrency = max(1, int(self.pw_concurrency.get()))
+        except Exception:
+            pass
+        e.pw_wait = self.pw_wait.get().strip() or DEFAULT_WAIT
+        e.pw_block = self.pw_block.get().split()
+        e.pw_all_matches = bool(self.pw_all_matches.get())
+        try:
+            e.pw_viewports = parse_viewports(self.pw_viewports.get())
+        except ValueError as ex:
+            self.ui_log(f"Viewports ignored: {ex}")
+            e.pw_viewports = []
+
+    def on_session_changed(self):
+        if isinstance(self.engine.session_number, int):
+            self.session_number.set(self.engine.session_number)
+        folder_name = os.path.basename(self.active_session_folder) or "None"
+        self.current_session_label.config(text=f"Current Session: {folder_name}")
+        self.update_status()
+
+    def ensure_session(self) -> bool:
+        if self.active_session_folder:
+            return True
+        return self.create_session_folder()
 
     def start_session(self):
         if self.mode.get() == "manual" and self.running:
@@ -725,155 +1049,157 @@ class ScreenshotOrganizerApp:
             self.ui_log("Playwright mode ready. Click 'Capture Now' when you want screenshots.")
 
     def new_session(self):
-        current = self.session_number.get()
-        self.session_number.set(max(1, current + 1))
-        if not self.create_session_folder():
-            return
-        self.ui_log(f"Started new session: {self.active_session_folder}")
-
-    def create_session_folder(self):
-        project = self.safe_name(self.project.get())
-        audit_type = self.safe_name(self.audit_type.get())
-        year = self.safe_name(self.year.get())
-        if not project or not audit_type or not year:
-            messagebox.showerror("Error", "Year, Project, and Audit Type are required.")
-            return False
-
+        self.sync_engine()
         try:
-            session_num = int(self.session_number.get())
-        except Exception:
-            messagebox.showerror("Error", "Start Index must be a number.")
-            return False
-        if session_num < 1:
-            session_num = 1
-            self.session_number.set(1)
+            self.engine.new_session()
+        except SessionError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        finally:
+            self.on_session_changed()
 
-        session_index = str(session_num).zfill(3)
-        folder_name = f"{year}-{project}-{audit_type}-{session_index}"
-        self.active_session_folder = os.path.join(self.output_base_folder.get(), folder_name)
+    def create_session_folder(self) -> bool:
+        self.sync_engine()
         try:
-            os.makedirs(self.active_session_folder, exist_ok=True)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not create session folder:\n{e}")
+            self.engine.create_session_folder()
+        except SessionError as e:
+            messagebox.showerror("Error", str(e))
             return False
-
-        self.current_session_label.config(text=f"Current Session: {folder_name}")
-        self.ui_log(f"Session folder created: {self.active_session_folder}")
-        self.update_status()
+        finally:
+            self.on_session_changed()
         return True
 
     def start_watching(self):
-        if self.running:
-            self.ui_log("Watcher already active.")
-            self.update_status()
-            return
-        watch_path = self.screenshot_folder.get()
-        if not os.path.isdir(watch_path):
-            messagebox.showerror("Error", f"Source folder not found:\n{watch_path}")
-            return
-        event_handler = ScreenshotHandler(self)
-        self.observer = Observer()
-        self.observer.schedule(event_handler, watch_path, recursive=False)
-        self.observer.start()
-        self.running = True
-        self.ui_log(f"Started watching: {watch_path}")
+        self.sync_engine()
+        try:
+            self.engine.start_watching()
+        except SessionError as e:
+            messagebox.showerror("Error", str(e))
         self.update_status()
 
     def stop_watching(self):
-        if self.observer:
-            try:
-                self.observer.stop()
-                self.observer.join(timeout=3)
-            except Exception:
-                pass
-            self.observer = None
-        if self.running:
-            self.ui_log("Stopped watching.")
-        self.running = False
+        self.engine.stop_watching()
         self.update_status()
 
-    def process_queue(self):
-        while True:
-            src_path = self.file_queue.get()
-            try:
-                if src_path:
-                    self.move_screenshot_with_retries(src_path)
-            finally:
-                self.file_queue.task_done()
-
-    def move_screenshot_with_retries(self, src_path: str, retries: int = 12, delay: float = 0.25):
-        for _ in range(retries):
-            if not os.path.exists(src_path):
-                return
-            if not self.active_session_folder:
-                self.ui_log("No active session. Start a session first.")
-                return
+    def capture_now(self):
+        if not self.ensure_session():
+            return
+        self.sync_engine()
+        self.run_background(self.engine.run_playwright_capture)
 
-            filename = os.path.basename(src_path)
-            dest_path = ensure_unique_path(os.path.join(self.active_session_folder, filename))
+    def capture_batch(self):
+        list_path = filedialog.askopenfilename(
+            title="URL list (one URL per line, optional selector after a space)",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+        )
+        if not list_path:
+            return
+        if not self.ensure_session():
+            return
+        self.sync_engine()
+        self.run_background(self.engine.run_batch_capture, list_path)
 
+    def show_gallery(self):
+        if not self.active_session_folder:
+            messagebox.showinfo("Info", "Start or open a session first.")
+            return
+        try:
+            import PIL
+        except ImportError:
+            messagebox.showerror("Error", "The gallery requires Pillow. Install with: pip install pillow")
+            return
+        if self.gallery:
+            self.gallery.show()
+        else:
+            self.gallery = SessionGallery(self)
+
+    def verify_session(self):
+        if not self.active_session_folder:
+            messagebox.showinfo("Info", "Start or open a session first.")
+            return
+
+        def run():
             try:
-                shutil.move(src_path, dest_path)
-                self.ui_log(f"Moved: {os.path.basename(dest_path)} → {self.active_session_folder}")
-                return
-            except PermissionError:
-                time.sleep(delay)
+                self.engine.verify_session()
             except Exception as e:
-                self.ui_log(f"Error moving file: {e}")
-                return
+                self.ui_log(f"Verify error: {e}")
 
-        self.ui_log(f"Skipped (file still locked): {os.path.basename(src_path)}")
+        self.run_background(run)
 
-    def timestamp(self) -> str:
-        return datetime.now().strftime("%Y%m%d_%H%M%S")
+    def find_near_duplicates(self):
+        if not self.active_session_folder:
+            messagebox.showinfo("Info", "Start or open a session first.")
+            return
 
-    def safe_name(self, s: str) -> str:
-        s = s.strip()
-        s = re.sub(r"[^\w\-\.]+", "_", s)
-        return s[:80] if len(s) > 80 else s
+        def run():
+            try:
+                report = self.engine.near_duplicates()
+            except Exception as e:
+                self.ui_log(f"Near-duplicate error: {e}")
+                return
+            if report["extras"]:
+                self.ui_call(self.offer_duplicate_move, report)
 
-    def capture_now(self):
-        self.ensure_session()
-        threading.Thread(target=self.run_playwright_capture, daemon=True).start()
+        self.run_background(run)
 
-    def run_playwright_capture(self):
-        try:
-            from playwright.sync_api import sync_playwright
+    def offer_duplicate_move(self, report):
+        groups = len(report["groups"])
+        if not messagebox.askyesno(
+            "Near Duplicates",
+            f"Found {report['extras']} near-duplicate(s) in {groups} group(s).\n\nMove the extras to the _duplicates subfolder?",
+        ):
+            return
 
-            url = self.pw_url.get().strip()
-            if not url:
-                self.ui_log("Playwright: URL is empty.")
-                return
-            if not re.match(r"^https?://", url, flags=re.IGNORECASE):
-                url = f"https://{url}"
+        def run():
+            try:
+                self.engine.move_near_duplicates(report)
+            except Exception as e:
+                self.ui_log(f"Near-duplicate error: {e}")
 
-            fullpage = bool(self.pw_fullpage.get())
-            selector = self.pw_selector.get().strip()
-            if not fullpage and not selector:
-                self.ui_log("Playwright: nothing to capture. Enable full page or provide a selector.")
-                return
+        self.run_background(run)
 
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, wait_until="networkidle", timeout=60000)
+    def export_session(self):
+        if not self.active_session_folder:
+            messagebox.showinfo("Info", "Start or open a session first.")
+            return
+        session_folder = self.active_session_folder
+        archive_path = filedialog.asksaveasfilename(
+            initialdir=os.path.dirname(session_folder),
+            initialfile=f"{os.path.basename(session_folder)}.zip",
+            defaultextension=".zip",
+            filetypes=[("ZIP archive", "*.zip"), ("Tar archive", "*.tar")],
+            confirmoverwrite=False,
+        )
+        if not archive_path:
+            return
+
+        def run():
+            try:
+                self.engine.export_sessions(archive_path, [session_folder])
+            except Exception as e:
+                self.ui_log(f"Export error: {e}")
 
-                if fullpage:
-                    fp_path = ensure_unique_path(os.path.join(self.active_session_folder, f"{self.timestamp()}_fullpage.png"))
-                    page.screenshot(path=fp_path, full_page=True)
-                    self.ui_log(f"Saved: {os.path.basename(fp_path)}")
+        self.run_background(run)
 
-                if selector:
-                    el_path = ensure_unique_path(
-                        os.path.join(self.active_session_folder, f"{self.timestamp()}_element_{self.safe_name(selector)}.png")
-                    )
-                    page.locator(selector).first.screenshot(path=el_path)
-                    self.ui_log(f"Saved: {os.path.basename(el_path)}")
+    def search_catalog(self):
+        text = simpledialog.askstring("Search Evidence", "Find files by name, session, URL, page title or selector:", parent=self.root)
+        if not text or not text.strip():
+            return
+        self.sync_engine()
 
-                browser.close()
+        def run():
+            try:
+                results = self.engine.search_catalog(text)
+            except Exception as e:
+                self.ui_log(f"Search error: {e}")
+                return
+            for r in results[:20]:
+                label = f" — {r['title']}" if r["title"] else ""
+                self.ui_log(f"  {r['session']}/{r['file']}{label}")
+            if len(results) > 20:
+                self.ui_log(f"  … {len(results) - 20} more")
 
-        except Exception as e:
-            self.ui_log(f"Playwright error: {e}")
+        self.run_background(run)
 
     def open_session_folder(self):
         self.ensure_session()
@@ -886,8 +1212,9 @@ class ScreenshotOrganizerApp:
         self.status_label.config(text=f"{mode} | {watch} | {toolbar}")
 
     def on_close(self):
-        if self.running:
-            self.stop_watching()
+        if self.gallery:
+            self.gallery.close()
+        self.engine.shutdown()
         if self.toolbar:
             try:
                 self.toolbar.win.destroy()
@@ -896,11 +1223,252 @@ class ScreenshotOrganizerApp:
         self.root.destroy()
 
 
-def main():
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Organize screenshots into session based evidence folders.")
+    parser.add_argument("--headless", action="store_true", help="run the folder watcher without the GUI")
+    parser.add_argument("--source", nargs="+", default=[DEFAULT_SCREENSHOT_FOLDER], metavar="FOLDER", help="screenshot folder(s) to watch")
+    parser.add_argument("--recursive", action="store_true", help="also watch subfolders of each source")
+    parser.add_argument("--patterns", nargs="+", default=list(DEFAULT_FILE_PATTERNS), metavar="PATTERN", help="file types to file, as extensions or globs (default: *.png)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FOLDER, help="folder where session folders are created")
+    parser.add_argument("--year", default=None)
+    parser.add_argument("--project", default="CSP")
+    parser.add_argument("--audit-type", default="Annual")
+    parser.add_argument("--index", type=int, default=1, help="session starting index")
+    parser.add_argument("--rules", metavar="RULES_JSON", help="route incoming files into session subfolders using this rules file (reloaded when it changes)")
+    parser.add_argument("--fsync", action="store_true", help="flush each filed file and its folder to disk before removing the source")
+    parser.add_argument("--no-verify-copies", action="store_true", help="skip re-reading cross-volume copies to check them against the source hash")
+    parser.add_argument("--catch-up", type=float, metavar="HOURS", help="also file screenshots already in the source folder from the last HOURS (0 = all)")
+    parser.add_argument("--duplicates", choices=DEDUP_MODES, default="skip", help="what to do with byte-identical files in a session")
+    parser.add_argument("--optimize", choices=OPTIMIZE_FORMATS, default="off", help="losslessly recompress PNGs (png) or transcode them to lossless WebP (webp) in the background")
+    parser.add_argument("--optimize-workers", type=int, default=1, help="CPU budget for --optimize (worker processes)")
+    parser.add_argument("--interval", type=float, metavar="SECONDS", help="in headless mode, also capture the screen every SECONDS")
+    parser.add_argument("--frames", type=int, default=0, help="stop --interval capture after this many frames (0 = until stopped)")
+    parser.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE_PERCENT, metavar="PERCENT", help="skip --interval frames that changed less than this")
+    parser.add_argument("--monitor", default="primary", help="monitor for screen capture: primary, all, or a monitor number")
+    parser.add_argument("--metrics-port", type=int, default=0, metavar="PORT", help="serve pipeline metrics in Prometheus text format on 127.0.0.1:PORT (/metrics, /metrics.json)")
+    parser.add_argument("--metrics-snapshot", type=float, default=0.0, metavar="SECONDS", help="write a JSON metrics snapshot to <output>/.organizer/metrics.json every SECONDS")
+    parser.add_argument("--verify", metavar="SESSION_FOLDER", help="re-hash a session against its manifest, print the root digest, then exit")
+    parser.add_argument("--workers", type=int, default=None, help="threads for --verify and --export, processes for --near-duplicates (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print --verify results as JSON")
+    parser.add_argument("--near-duplicates", metavar="SESSION_FOLDER", help="group visually near-identical images in a session, write a report, then exit")
+    parser.add_argument("--distance", type=non_negative_int, default=None, help="max perceptual-hash bit difference for --near-duplicates (default 6)")
+    parser.add_argument("--move-duplicates", action="store_true", help="move near-duplicates to the session's _duplicates subfolder")
+    parser.add_argument("--search", metavar="QUERY", help="search the catalog of sessions under --output, print matches, then exit")
+    parser.add_argument("--limit", type=int, default=50, help="max results for --search")
+    parser.add_argument("--reindex", action="store_true", help="bring the catalog under --output up to date with every session manifest, then exit")
+    parser.add_argument("--export", nargs="+", metavar="SESSION_FOLDER", help="stream one or more sessions into a ZIP or tar archive with a hash manifest, then exit")
+    parser.add_argument("--archive", help="archive path for --export (.zip or .tar; default: <session>.zip next to the first session). Re-run to resume")
+    parser.add_argument("--batch", metavar="URL_LIST", help="capture every URL in the file with Playwright, then exit")
+    parser.add_argument("--concurrency", type=int, default=4, help="pages captured at once in batch mode")
+    parser.add_argument("--page-timeout", type=float, default=90.0, help="seconds allowed per URL in batch mode")
+    parser.add_argument("--retries", type=int, default=1, help="extra attempts per URL in batch mode")
+    parser.add_argument("--no-fullpage", action="store_true", help="only capture selectors in batch mode")
+    parser.add_argument("--wait", type=wait_arg, default=DEFAULT_WAIT, metavar="STRATEGY",
+                        help="when a page is ready to capture: load, domcontentloaded, networkidle[:CAP], selector:CSS, settle:SECONDS; join steps with + (default: networkidle, capped)")
+    parser.add_argument("--idle-cap", type=float, default=DEFAULT_IDLE_CAP, metavar="SECONDS", help="longest wait for network idle before capturing anyway")
+    parser.add_argument("--nav-timeout", type=float, default=DEFAULT_NAV_TIMEOUT, metavar="SECONDS", help="navigation and selector wait timeout")
+    parser.add_argument("--viewport", nargs="+", type=viewport_arg, default=[], metavar="SIZE",
+                        help="capture at each viewport (WIDTHxHEIGHT or desktop, laptop, tablet, mobile) from one page load")
+    parser.add_argument("--all-matches", action="store_true", help="capture every element matching each selector, not just the first")
+    parser.add_argument("--block", nargs="+", default=[], metavar="ITEM", help="abort matching requests: trackers, resource types (font, media, image, ...) or URL globs")
+    return parser
+
+
+def non_negative_int(value: str) -> int:
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {value!r}")
+    if n < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more")
+    return n
+
+
+def wait_arg(value: str) -> str:
+    try:
+        parse_wait(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def viewport_arg(value: str):
+    try:
+        return parse_viewports(value)[0]
+    except (ValueError, IndexError) as e:
+        raise argparse.ArgumentTypeError(str(e) or f"bad viewport {value!r}")
+
+
+def print_log(line: str):
+    sys.stdout.write(f"{line}\n")
+    sys.stdout.flush()
+
+
+def engine_from_args(args) -> OrganizerEngine:
+    engine = OrganizerEngine(log=print_log)
+    if args.year:
+        engine.year = args.year
+    engine.project = args.project
+    engine.audit_type = args.audit_type
+    engine.session_number = args.index
+    engine.screenshot_folder = args.source[0]
+    engine.source_folders = args.source[1:]
+    engine.watch_recursive = args.recursive
+    engine.file_patterns = parse_patterns(args.patterns)
+    engine.routing_rules_path = args.rules or ""
+    engine.move_fsync = args.fsync
+    engine.move_verify = not args.no_verify_copies
+    engine.output_base_folder = args.output
+    engine.dedup_mode = args.duplicates
+    engine.optimize_format = args.optimize
+    engine.optimize_workers = max(1, args.optimize_workers)
+    if args.catch_up is not None:
+        engine.catchup_enabled = True
+        engine.catchup_hours = max(0.0, args.catch_up)
+    engine.capture_monitor = args.monitor
+    if args.interval is not None:
+        engine.interval_seconds = max(0.05, args.interval)
+    engine.interval_frames = max(0, args.frames)
+    engine.interval_min_change = max(0.0, args.min_change)
+    engine.pw_concurrency = max(1, args.concurrency)
+    engine.pw_timeout = args.page_timeout
+    engine.pw_retries = max(0, args.retries)
+    engine.pw_fullpage = not args.no_fullpage
+    engine.pw_wait = args.wait
+    engine.pw_idle_cap = max(0.0, args.idle_cap)
+    engine.pw_nav_timeout = max(1.0, args.nav_timeout)
+    engine.pw_block = args.block
+    engine.pw_viewports = args.viewport
+    engine.pw_all_matches = args.all_matches
+    engine.metrics_port = max(0, args.metrics_port)
+    engine.metrics_interval = max(0.0, args.metrics_snapshot)
+    return engine
+
+
+def run_batch(args) -> int:
+    engine = engine_from_args(args)
+    engine.start_metrics()
+    try:
+        engine.create_session_folder()
+        summary = engine.run_batch_capture(args.batch)
+    except SessionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.shutdown()
+    if summary is None:
+        return 1
+    return 0 if summary["failed"] == 0 and summary["partial"] == 0 else 2
+
+
+def run_headless(args) -> int:
+    engine = engine_from_args(args)
+    engine.start()
+    try:
+        engine.create_session_folder()
+        engine.start_watching()
+        if args.interval is not None:
+            engine.start_interval()
+    except SessionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        engine.shutdown()
+        return 1
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.shutdown()
+    return 0
+
+
+def run_verify(args) -> int:
+    engine = OrganizerEngine(log=None if args.json else print_log)
+    try:
+        report = engine.verify_session(args.verify, workers=args.workers)
+    except SessionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.shutdown()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 0 if report["intact"] else 2
+
+
+def run_near_duplicates(args) -> int:
+    engine = OrganizerEngine(log=None if args.json else print_log)
+    try:
+        report = engine.near_duplicates(args.near_duplicates, max_distance=args.distance, workers=args.workers, move=args.move_duplicates)
+    except SessionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.shutdown()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_export(args) -> int:
+    engine = OrganizerEngine(log=None if args.json else print_log)
+    first = os.path.abspath(args.export[0])
+    archive_path = args.archive or f"{first.rstrip(os.sep)}.zip"
+    try:
+        report = engine.export_sessions(archive_path, args.export, workers=args.workers)
+    except SessionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.shutdown()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def run_catalog(args) -> int:
+    engine = OrganizerEngine(log=None if args.json else print_log)
+    engine.output_base_folder = args.output
+    try:
+        if args.reindex:
+            engine.reindex_catalog()
+        if args.search:
+            results = engine.search_catalog(args.search, limit=args.limit)
+            if args.json:
+                print(json.dumps(results, indent=2))
+            else:
+                for r in results:
+                    detail = " | ".join(v for v in (r["url"], r["title"], r["selector"]) if v)
+                    print(f"{r['path']}" + (f"  [{detail}]" if detail else ""))
+    finally:
+        engine.shutdown()
+    return 0
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.verify:
+        return run_verify(args)
+    if args.export:
+        return run_export(args)
+    if args.search or args.reindex:
+        return run_catalog(args)
+    if args.near_duplicates:
+        return run_near_duplicates(args)
+    if args.batch:
+        return run_batch(args)
+    if args.headless:
+        return run_headless(args)
+    if tk is None:
+        print("The GUI requires tkinter. Use --headless to run without a display.", file=sys.stderr)
+        return 1
     root = tk.Tk()
     ScreenshotOrganizerApp(root)
     root.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())